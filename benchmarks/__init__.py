@@ -0,0 +1,2 @@
+# Benchmarks do dashboard, executados fora do Streamlit a partir da raiz do projeto:
+#     python -m benchmarks.bench_agregacoes
@@ -0,0 +1,49 @@
+# Compara o estágio único de agregação (utils.agregacoes.agrega) com o bloco de tabelas original do Dashboard.
+#     python -m benchmarks.bench_agregacoes [linhas]
+
+import sys
+
+import pandas as pd
+
+from benchmarks.comum import cronometra, resume
+from benchmarks.sintetico import gera_dados
+from utils.agregacoes import agrega, tabela_estados
+
+
+## Cópia do bloco de TABELAS do Dashboard antes do estágio único de agregação
+def agregacao_original(dados):
+    receita_estados = dados.groupby('Local da compra')[['Preço']].sum()
+    receita_estados = dados.drop_duplicates(subset = 'Local da compra')[['Local da compra', 'lat', 'lon']].merge(receita_estados, left_on='Local da compra', right_index=True).sort_values('Preço', ascending=False)
+    receita_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq = 'M'))['Preço'].sum().reset_index()
+    receita_mensal['Ano'] = receita_mensal['Data da Compra'].dt.year
+    receita_mensal['Mês'] = receita_mensal['Data da Compra'].dt.month_name()
+    receita_categorias = dados.groupby('Categoria do Produto')[['Preço']].sum().sort_values('Preço', ascending=False)
+    vendas_estados = dados.groupby('Local da compra')[['Preço']].count()
+    vendas_estados = dados.drop_duplicates(subset= 'Local da compra')[['Local da compra', 'lat', 'lon']].merge(vendas_estados, left_on='Local da compra', right_index=True).sort_values('Preço', ascending=False)
+    venda_mensal = dados.set_index('Data da Compra').groupby(pd.Grouper(freq = 'M'))['Preço'].count().reset_index()
+    venda_mensal['Ano'] = venda_mensal['Data da Compra'].dt.year
+    venda_mensal['Mês'] = venda_mensal['Data da Compra'].dt.month_name()
+    vendas_categorias = dados.groupby('Categoria do Produto')[['Preço']].count().sort_values('Preço', ascending=False)
+    vendedores = pd.DataFrame(dados.groupby('Vendedor')['Preço'].agg(['sum', 'count']))
+    return (receita_estados, receita_mensal, receita_categorias, vendas_estados, venda_mensal, vendas_categorias,
+            vendedores, dados['Preço'].sum(), dados.shape[0])
+
+
+def main(n_linhas = 1_000_000):
+    dados = gera_dados(n_linhas)
+    coordenadas = tabela_estados(dados)
+    print(f'{n_linhas} linhas sintéticas')
+
+    # Conferindo que as duas versões chegam aos mesmos números antes de medir
+    original = agregacao_original(dados)
+    agregados = agrega(dados, coordenadas)
+    assert (original[0]['Preço'].values == agregados.receita_estados['Preço'].values).all()
+    assert (original[4]['Preço'].values == agregados.venda_mensal['Preço'].values).all()
+    assert original[8] == agregados.quantidade_vendas
+
+    resume('bloco original', cronometra(lambda: agregacao_original(dados)))
+    resume('agrega (um agg por dimensão)', cronometra(lambda: agrega(dados, coordenadas)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,67 @@
+# Latência de uma reexecução do Dashboard respondida pelo cubo mensal (utils.cubo) contra a agregação
+# das linhas brutas, numa sequência de trocas de região, ano e vendedores. Mede também a montagem do cubo
+# e a atualização incremental quando chega um mês novo.
+#     python -m benchmarks.bench_cubo [linhas]
+
+import sys
+
+from benchmarks.comum import cronometra, resume
+from benchmarks.sintetico import VENDEDORES, gera_dados
+from utils.agregacoes import agrega, agrega_cubo, tabela_estados
+from utils.cubo import CuboMensal, cubo_do_dataset, fatia_dashboard
+from utils.esquema import normaliza
+from utils.regioes import filtra_regiao_ano
+
+FILTROS = [
+    ('', '', []),
+    ('Sudeste', '', []),
+    ('Sudeste', 2022, []),
+    ('Sudeste', 2022, VENDEDORES[:2]),
+    ('Nordeste', '', VENDEDORES[:5]),
+]
+
+
+def agrega_linhas(dados, coordenadas, regiao, ano, vendedores):
+    filtrados = filtra_regiao_ano(dados, regiao, ano)
+    if vendedores:
+        filtrados = filtrados[filtrados['Vendedor'].isin(vendedores)]
+    return agrega(filtrados, coordenadas)
+
+
+def main(n_linhas = 1_000_000):
+    dados = normaliza(gera_dados(n_linhas))
+    coordenadas = tabela_estados(dados)
+    print(f'{n_linhas} linhas sintéticas')
+
+    resume('montagem do cubo (uma vez por dataset)', cronometra(lambda: CuboMensal.de_dados(dados), repeticoes = 1))
+    cubo = CuboMensal.de_dados(dados)
+    print(f'cubo com {len(cubo.celulas)} células')
+
+    # Atualização incremental: cubo montado sem o último mês e depois atualizado com os dados completos
+    marca = dados['Data da Compra'].max().to_period('M').start_time
+    cubo_antigo = CuboMensal.de_dados(dados[dados['Data da Compra'] < marca])
+    resume('atualização incremental (último mês)', cronometra(lambda: cubo_antigo.atualiza(dados, marca), repeticoes = 3))
+    assert cubo_antigo.atualiza(dados, marca).totais()[1] == cubo.totais()[1]
+
+    # Sem a garantia do snapshot (attrs['so_acrescenta']), uma nova versão da mesma fonte em que uma venda antiga
+    # trocou de vendedor remonta o cubo em vez de manter as células antigas
+    antigos = dados[dados['Data da Compra'] < marca].copy()
+    antigos.attrs = {'fonte': 'bench_cubo'}
+    cubo_do_dataset(antigos)
+    alterados = dados.copy()
+    alterados.attrs = {'fonte': 'bench_cubo'}
+    linha = (alterados['Data da Compra'] < marca).idxmax()
+    alterados.loc[linha, 'Vendedor'] = next(v for v in VENDEDORES if v != alterados.loc[linha, 'Vendedor'])
+    assert cubo_do_dataset(alterados).por('Vendedor').equals(CuboMensal.de_dados(alterados).por('Vendedor'))
+
+    for regiao, ano, vendedores in FILTROS:
+        nome = f'{regiao or "Brasil"}/{ano or "todos"}/{len(vendedores) or "todos"} vend.'
+        por_linhas = agrega_linhas(dados, coordenadas, regiao, ano, vendedores)
+        por_cubo = agrega_cubo(fatia_dashboard(cubo, regiao, ano, vendedores), coordenadas)
+        assert por_linhas.quantidade_vendas == por_cubo.quantidade_vendas
+        resume(f'linhas: {nome}', cronometra(lambda: agrega_linhas(dados, coordenadas, regiao, ano, vendedores)))
+        resume(f'cubo:   {nome}', cronometra(lambda: agrega_cubo(fatia_dashboard(cubo, regiao, ano, vendedores), coordenadas)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
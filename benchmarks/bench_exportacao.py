@@ -0,0 +1,44 @@
+# Tempo e pico de memória das exportações da Tabela de dados: converte_xlsx original (pandas ExcelWriter +
+# laço no cabeçalho) contra utils.exportacao (xlsxwriter em constant_memory), além de CSV e Parquet.
+#     python -m benchmarks.bench_exportacao [linhas ...]
+
+import sys
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.comum import mede
+from benchmarks.sintetico import gera_dados
+from utils.esquema import normaliza
+from utils.exportacao import exporta_csv, exporta_parquet, exporta_xlsx
+
+
+## Cópia do converte_xlsx da página antes do utils.exportacao
+def converte_xlsx_original(df):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter', datetime_format='yyyy-mm-dd', date_format='yyyy-mm-dd') as writer:
+        df.to_excel(writer, index=False)
+        workbook = writer.book
+        worksheet = writer.sheets['Sheet1']
+        header_format = workbook.add_format({'border': False})
+        for col_num, value in enumerate(df.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+    output.seek(0)
+    return output.getvalue()
+
+
+def main(tamanhos = (100_000, 1_000_000)):
+    funcoes = [('csv', exporta_csv), ('xlsx original', converte_xlsx_original),
+               ('xlsx constant_memory', exporta_xlsx), ('parquet', exporta_parquet)]
+    for n_linhas in tamanhos:
+        dados = normaliza(gera_dados(n_linhas))
+        print(f'{n_linhas} linhas')
+        for nome, funcao in funcoes:
+            arquivos = []
+            (duracao,), (pico,) = mede(lambda: arquivos.append(funcao(dados)), repeticoes = 1)
+            tamanho = len(arquivos[-1])
+            print(f'  {nome:<22} {duracao:8.2f} s   pico {pico / 2**20:8.1f} MB   arquivo {tamanho / 2**20:7.1f} MB')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or (100_000, 1_000_000))
@@ -0,0 +1,76 @@
+# Latência dos filtros da Tabela de dados: dados.query(...) original contra o motor de filtros (utils.filtros),
+# numa sequência de reexecuções em que o usuário mexe em um widget por vez.
+#     python -m benchmarks.bench_filtros [linhas]
+
+import sys
+import time
+from datetime import date
+
+from benchmarks.comum import cronometra, resume
+from benchmarks.sintetico import gera_dados
+from utils.esquema import normaliza
+from utils.filtros import MotorFiltros
+
+## Cópia da query da página antes do motor de filtros
+QUERY_ORIGINAL = '''
+Produto in @produtos and \
+`Categoria do Produto` in @categoria and \
+@preco[0] <= Preço <= @preco[1] and \
+@frete[0] <= Frete <= @frete[1] and \
+@data_compra[0] <= `Data da Compra` <= @data_compra[1] and \
+Vendedor in @vendedor and \
+`Local da compra` in @local and \
+@avaliacao[0] <= `Avaliação da compra` <= @avaliacao[1] and \
+`Tipo de pagamento` in @tipo_pagamento and \
+@qtd_parcelas[0] <= `Quantidade de parcelas` <= @qtd_parcelas[1]
+'''
+
+
+def filtra_original(dados, s):
+    produtos, categoria, vendedor = s['Produto'], s['Categoria do Produto'], s['Vendedor']
+    local, tipo_pagamento = s['Local da compra'], s['Tipo de pagamento']
+    preco, frete, data_compra = s['Preço'], s['Frete'], s['Data da Compra']
+    avaliacao, qtd_parcelas = s['Avaliação da compra'], s['Quantidade de parcelas']
+    return dados.query(QUERY_ORIGINAL)
+
+
+## Seleções padrão dos widgets da página (tudo selecionado) e alterações de um widget por vez
+def sequencia_de_reexecucoes(dados):
+    padrao = {
+        'Produto': list(dados['Produto'].unique()),
+        'Categoria do Produto': list(dados['Categoria do Produto'].unique()),
+        'Preço': (0, 5000),
+        'Frete': (0, 250),
+        'Data da Compra': (dados['Data da Compra'].min().date(), dados['Data da Compra'].max().date()),
+        'Vendedor': list(dados['Vendedor'].unique()),
+        'Local da compra': list(dados['Local da compra'].unique()),
+        'Avaliação da compra': (1, 5),
+        'Tipo de pagamento': list(dados['Tipo de pagamento'].unique()),
+        'Quantidade de parcelas': (1, 24),
+    }
+    passos = [('padrão (tudo selecionado)', dict(padrao))]
+    passos.append(('muda o preço', dict(passos[-1][1], **{'Preço': (100, 2000)})))
+    passos.append(('muda os vendedores', dict(passos[-1][1], **{'Vendedor': padrao['Vendedor'][:3]})))
+    passos.append(('muda a data', dict(passos[-1][1], **{'Data da Compra': (date(2021, 1, 1), date(2022, 6, 30))})))
+    passos.append(('muda o preço de novo', dict(passos[-1][1], **{'Preço': (200, 3000)})))
+    return passos
+
+
+def main(n_linhas = 1_000_000):
+    dados = normaliza(gera_dados(n_linhas))
+    print(f'{n_linhas} linhas sintéticas')
+    resume('montagem dos índices (uma vez)', cronometra(lambda: MotorFiltros(dados), repeticoes = 1))
+
+    # O mesmo motor atravessa a sequência, como entre as reexecuções da página: em cada passo só o
+    # predicado alterado é recalculado, por isso a medida do motor é a da primeira chamada do passo
+    motor = MotorFiltros(dados)
+    for nome, selecoes in sequencia_de_reexecucoes(dados):
+        inicio = time.perf_counter()
+        filtrados = motor.filtra(dados, selecoes)
+        tempo_motor = time.perf_counter() - inicio
+        assert len(filtrados) == len(filtra_original(dados, selecoes))
+        resume(f'query: {nome}', cronometra(lambda: filtra_original(dados, selecoes)))
+        resume(f'motor: {nome}', [tempo_motor])
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
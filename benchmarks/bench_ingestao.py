@@ -0,0 +1,42 @@
+# Pico de memória e tempo da leitura em fluxo (utils.carregamento.baixa_dados) contra o caminho antigo
+# requests.get + response.json() + DataFrame.from_dict, com um servidor local servindo um payload grande.
+#     python -m benchmarks.bench_ingestao [linhas]
+
+import sys
+
+import pandas as pd
+import requests
+
+from benchmarks.comum import mede
+from benchmarks.servidor_local import servidor_local
+from benchmarks.sintetico import gera_payload_json
+from utils.carregamento import baixa_dados
+from utils.esquema import normaliza
+from utils.ingestao import registros_em_fluxo
+
+
+## Caminho de ingestão das páginas antes da leitura em fluxo
+def ingestao_original(url):
+    response = requests.get(url)
+    dados = pd.DataFrame.from_dict(response.json())
+    dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format = '%d/%m/%Y')
+    return normaliza(dados)
+
+
+def main(n_linhas = 500_000):
+    payload = gera_payload_json(n_linhas)
+    print(f'{n_linhas} linhas, payload de {len(payload) / 2**20:.1f} MB')
+    resultados = []
+    with servidor_local(payload) as url:
+        (t_original,), (pico_original,) = mede(lambda: ingestao_original(url), repeticoes = 1)
+        (t_fluxo,), (pico_fluxo,) = mede(lambda: resultados.append(baixa_dados(url = url)), repeticoes = 1)
+    em_fluxo = resultados[-1]
+    print(f'{"json() + from_dict":<24} {t_original:7.2f} s   pico {pico_original / 2**20:8.1f} MB')
+    print(f'{"leitura em fluxo":<24} {t_fluxo:7.2f} s   pico {pico_fluxo / 2**20:8.1f} MB')
+    assert len(em_fluxo) == n_linhas
+    # As colunas saem na ordem das chaves dos registros da API, independente do hash das strings
+    assert list(em_fluxo.columns) == list(next(registros_em_fluxo([payload])))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,48 @@
+# Tamanho do que vai para o navegador a cada reexecução da Tabela de dados: a tabela filtrada inteira
+# (st.dataframe antigo) contra só a página visível. O Streamlit envia dataframes como Arrow IPC,
+# então o payload é medido serializando do mesmo jeito.
+#     python -m benchmarks.bench_paginacao [linhas]
+
+import sys
+
+import pyarrow as pa
+
+from benchmarks.comum import cronometra, resume
+from benchmarks.sintetico import gera_dados
+from utils.esquema import normaliza
+from utils.filtros import MotorFiltros
+from utils.paginacao import linhas_visiveis, pagina
+
+
+def tamanho_payload(dados):
+    tabela = pa.Table.from_pandas(dados)
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().size
+
+
+def main(n_linhas = 500_000, tamanho_pagina = 100):
+    dados = normaliza(gera_dados(n_linhas))
+    colunas = list(dados.columns)
+    motor = MotorFiltros(dados)
+    selecoes = {'Preço': (100, 4000)}
+    mascara = motor.mascara(selecoes)
+    posicoes = linhas_visiveis(motor, dados, mascara, 'bench', 'Preço', False)
+
+    completa = dados[mascara][colunas]
+    visivel = pagina(dados, posicoes, colunas, tamanho_pagina, 1)
+    payload_completo, payload_pagina = tamanho_payload(completa), tamanho_payload(visivel)
+    print(f'{len(completa)} linhas filtradas de {n_linhas}')
+    print(f'payload da tabela inteira  {payload_completo / 2**20:10.2f} MB')
+    print(f'payload da página ({tamanho_pagina})   {payload_pagina / 2**10:10.2f} KB')
+    resume('serializa a tabela inteira', cronometra(lambda: tamanho_payload(dados[mascara][colunas])))
+    resume('recorta e serializa a página', cronometra(lambda: tamanho_payload(pagina(dados, posicoes, colunas, tamanho_pagina, 2))))
+
+    # O payload por reexecução depende só do tamanho da página, não do total de linhas filtradas
+    assert len(visivel) == tamanho_pagina
+    assert payload_pagina < payload_completo / 100
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,54 @@
+# Pré-carregamento das partições região/ano (utils.prefetch) contra um servidor local que simula a latência
+# da API e falha de vez em quando, comparando com baixar as partições uma a uma.
+#     python -m benchmarks.bench_prefetch [linhas por partição] [latência em segundos]
+
+import sys
+import threading
+import time
+
+import requests
+
+from benchmarks.servidor_local import servidor_local
+from benchmarks.sintetico import gera_payload_json
+from utils import carregamento, config
+from utils.prefetch import aquece_particoes, particoes
+
+
+def main(n_linhas = 20_000, latencia = 0.5):
+    payload = gera_payload_json(n_linhas)
+    requisicoes = []
+    trava = threading.Lock()
+
+    def responde(caminho):
+        with trava:
+            requisicoes.append(caminho)
+            falha = len(requisicoes) % 7 == 0  # Uma em cada sete requisições falha, para exercitar as novas tentativas
+        time.sleep(latencia)
+        return (503, b'[]') if falha else payload
+
+    config.SNAPSHOT_ATIVO = False
+    with servidor_local(responde) as url:
+        config.URL_API = url
+
+        inicio = time.perf_counter()
+        for regiao, ano in particoes():
+            try:
+                carregamento.baixa_dados(regiao, ano)
+            except requests.RequestException:
+                carregamento.baixa_dados(regiao, ano)
+        sequencial = time.perf_counter() - inicio
+
+        carregamento._cache.limpa()
+        inicio = time.perf_counter()
+        resultados = aquece_particoes()
+        paralelo = time.perf_counter() - inicio
+
+    falhas = [particao for particao, erro in resultados.items() if erro is not None]
+    print(f'{len(particoes())} partições de {n_linhas} linhas, latência de {latencia} s por requisição')
+    print(f'uma a uma       {sequencial:6.2f} s')
+    print(f'pré-carregamento {paralelo:6.2f} s   ({config.PREFETCH_PARALELO} em paralelo, {len(falhas)} partições com falha)')
+    print(f'cache: {len(carregamento.estatisticas_cache()["entradas"])} entradas')
+
+
+if __name__ == '__main__':
+    main(*(conversor(valor) for conversor, valor in zip((int, float), sys.argv[1:])))
@@ -0,0 +1,89 @@
+# Tempo até a primeira tela do Dashboard.
+# 1. Trabalho das figuras na primeira tela: antes (st.tabs) as três abas eram montadas e serializadas a
+#    cada reexecução; agora só a seção visível (as outras são aquecidas em segundo plano).
+#    A serialização é medida com fig.to_json(), o mesmo JSON que o st.plotly_chart envia.
+# 2. Com o streamlit.testing disponível, a execução completa do Dashboard.py num processo novo (importações,
+#    leitura do snapshot sintético, cubo, figuras), que é o que o usuário espera na primeira visita.
+#    Para comparar com uma versão anterior da página, passe o arquivo dela em --script-antes, por exemplo:
+#        git show <revisão>:Dashboard.py > /tmp/Dashboard_antes.py
+#     python -m benchmarks.bench_primeira_tela [--linhas 100000] [--script-antes /tmp/Dashboard_antes.py]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.comum import cronometra, resume
+from benchmarks.sintetico import gera_dados
+from utils import graficos
+from utils.agregacoes import agregados_dashboard
+from utils.esquema import normaliza
+from utils.snapshot import Snapshot
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Executado num processo novo para a medição incluir as importações da página
+EXECUTA_PAGINA = '''
+import sys, time
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout = 600).run()
+duracao = time.perf_counter() - inicio
+if app.exception:
+    raise SystemExit(app.exception[0].message)
+print(duracao)
+'''
+
+
+def monta_e_serializa(agregados, secoes):
+    graficos._cache.limpa()
+    for secao in secoes:
+        for figura in graficos.SECOES[secao](agregados).values():
+            figura.to_json()
+
+
+def executa_pagina(script, diretorio_snapshot, repeticoes):
+    ambiente = dict(os.environ, DASHBOARD_DIRETORIO_SNAPSHOT = diretorio_snapshot, PYTHONPATH = str(RAIZ))
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-c', EXECUTA_PAGINA, str(script)], cwd = RAIZ, env = ambiente,
+                               capture_output = True, text = True, check = True)
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return tempos
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = 'Tempo até a primeira tela do Dashboard.')
+    parser.add_argument('--linhas', type = int, default = 100_000, help = 'Tamanho do dataset sintético')
+    parser.add_argument('--repeticoes', type = int, default = 5)
+    parser.add_argument('--script-antes', default = None, help = 'Versão anterior do Dashboard.py para comparar')
+    argumentos = parser.parse_args(argumentos)
+
+    dados = normaliza(gera_dados(argumentos.linhas))
+    agregados = agregados_dashboard(dados)
+    print(f'{argumentos.linhas} linhas sintéticas')
+
+    primeira = next(iter(graficos.SECOES))
+    resume('figuras: todas as abas (antes)', cronometra(lambda: monta_e_serializa(agregados, graficos.SECOES), argumentos.repeticoes))
+    resume('figuras: só a seção visível', cronometra(lambda: monta_e_serializa(agregados, [primeira]), argumentos.repeticoes))
+
+    try:
+        import streamlit.testing.v1
+    except ImportError:
+        print('streamlit.testing indisponível: execução completa da página não medida')
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        Snapshot(diretorio).grava(dados)
+        scripts = [('página atual', RAIZ / 'Dashboard.py')]
+        if argumentos.script_antes:
+            scripts.insert(0, ('página anterior', Path(argumentos.script_antes).resolve()))
+        for nome, script in scripts:
+            tempos = executa_pagina(script, diretorio, argumentos.repeticoes)
+            resume(f'Dashboard.py completo ({nome})', tempos)
+
+
+if __name__ == '__main__':
+    main()
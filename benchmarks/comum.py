@@ -0,0 +1,54 @@
+# Funções de medição compartilhadas pelos benchmarks
+
+import gc
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+
+## Executa a função algumas vezes e devolve os tempos em segundos
+def cronometra(funcao, repeticoes = 5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def resume(nome, tempos):
+    print(f'{nome:<40} mediana {statistics.median(tempos) * 1000:9.1f} ms   mínimo {min(tempos) * 1000:9.1f} ms')
+
+
+## Tempos (s) e picos de memória (bytes alocados além do que já existia) de cada repetição. O preparo roda
+## fora da medição e seu resultado é passado para a função; os picos saem de uma segunda passada com o
+## tracemalloc ligado, para que o rastreamento não distorça os tempos.
+def mede(funcao, repeticoes = 5, preparo = None, memoria = True):
+    def executa():
+        argumento = preparo() if preparo is not None else None
+        gc.collect()
+        base = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        funcao(argumento) if preparo is not None else funcao()
+        duracao = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1] - base if tracemalloc.is_tracing() else 0
+        return duracao, pico
+
+    tempos = [executa()[0] for _ in range(repeticoes)]
+    picos = []
+    if memoria:
+        tracemalloc.start()
+        try:
+            picos = [executa()[1] for _ in range(repeticoes)]
+        finally:
+            tracemalloc.stop()
+    return tempos, picos
+
+
+def percentis(valores, quais = (50, 95)):
+    return [float(np.percentile(valores, q)) for q in quais] if valores else [float('nan')] * len(quais)
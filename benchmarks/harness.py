@@ -0,0 +1,162 @@
+# Bateria reprodutível do app inteiro fora do Streamlit, com dados sintéticos no esquema da API.
+# Cada cenário repete o que uma reexecução das páginas faz, chamando as mesmas funções de utils:
+# leitura do JSON da API, primeira execução e troca de filtros do Dashboard (cubo, agregados e figuras),
+# e filtros, página ordenada e exportações da Tabela de dados. Para cada tamanho são mostrados os
+# percentis de latência e do pico de memória (tracemalloc: alocações do Python e do numpy; buffers do
+# Arrow não entram na conta).
+#     python -m benchmarks.harness [--linhas 10000 100000 1000000] [--repeticoes 5] [--sem-memoria]
+#                                  [--cenarios dashboard tabela ...] [--json resultados.json]
+
+import argparse
+import itertools
+import json
+import platform
+import time
+
+from benchmarks.comum import mede, percentis
+from benchmarks.sintetico import VENDEDORES, gera_dados, gera_payload_json
+from utils import agregacoes, config, exportacao, graficos, paginacao
+from utils.agregacoes import agregados_dashboard
+from utils.esquema import normaliza
+from utils.exportacao import exporta_csv, exporta_parquet, exporta_xlsx, impressao_digital
+from utils.filtros import motor_filtros
+from utils.ingestao import dataframe_em_fluxo
+from utils.paginacao import linhas_visiveis, pagina
+
+TAMANHOS = (10_000, 100_000, 1_000_000)
+
+## Trocas de filtro do Dashboard (região, ano, vendedores), percorridas em ciclo
+FILTROS_DASHBOARD = [
+    ('Sudeste', '', []),
+    ('Sudeste', 2022, []),
+    ('Sudeste', 2022, VENDEDORES[:2]),
+    ('Nordeste', '', VENDEDORES[:5]),
+    ('', 2021, []),
+    ('', '', VENDEDORES[3:6]),
+]
+
+TAMANHO_PAGINA = 100
+
+
+## Figuras das três seções do Dashboard (a visível e as aquecidas em segundo plano), com o número padrão de vendedores
+def figuras_dashboard(agregados):
+    return [figura for secao in graficos.SECOES.values() for figura in secao(agregados).values()]
+
+
+## Seleções iniciais da Tabela de dados: todos os valores de cada multiselect e os extremos dos sliders
+def selecoes_iniciais(dados):
+    selecoes = {coluna: list(dados[coluna].unique()) for coluna in
+                ['Produto', 'Categoria do Produto', 'Vendedor', 'Local da compra', 'Tipo de pagamento']}
+    selecoes.update({
+        'Preço': (0, 5000),
+        'Frete': (0, 250),
+        'Data da Compra': (dados['Data da Compra'].min().date(), dados['Data da Compra'].max().date()),
+        'Avaliação da compra': (1, 5),
+        'Quantidade de parcelas': (1, 24),
+    })
+    return selecoes
+
+
+## Cada troca de filtro da Tabela usa uma faixa de preço nova, para não cair nas máscaras já guardadas
+def selecoes_alteradas(dados, numero):
+    selecoes = selecoes_iniciais(dados)
+    selecoes['Preço'] = (100 + numero, 4000)
+    selecoes['Categoria do Produto'] = selecoes['Categoria do Produto'][:4]
+    return selecoes
+
+
+def mostra_pagina_tabela(motor, dados, selecoes, ordenar_por):
+    colunas = list(dados.columns)
+    mascara = motor.mascara(selecoes)
+    impressao = impressao_digital(dados, selecoes, colunas)
+    posicoes = linhas_visiveis(motor, dados, mascara, impressao, ordenar_por, False)
+    return pagina(dados, posicoes, colunas, TAMANHO_PAGINA, 1)
+
+
+def limpa_caches():
+    agregacoes._cache_agregados.limpa()
+    graficos._cache.limpa()
+    paginacao._cache.limpa()
+    exportacao._cache.limpa()
+
+
+## Cenários de um tamanho: nome -> (funcao, preparo). Os preparos entregam cópias novas do dataset quando o
+## cenário mede a primeira execução, já que cubo, índices e agregados ficam guardados por objeto.
+def cenarios(n_linhas):
+    dados = normaliza(gera_dados(n_linhas))
+    dados.attrs['fonte'] = ('harness', n_linhas)  # Registro próprio no cubo, separado das cópias
+    payload = gera_payload_json(n_linhas)
+    filtros = itertools.cycle(FILTROS_DASHBOARD)
+    numeros = itertools.count()
+    motor = motor_filtros(dados)
+    agregados_dashboard(dados)  # Cubo e tabela de coordenadas já montados para as trocas de filtro
+
+    def copia_nova():
+        limpa_caches()
+        copia = dados.copy()
+        copia.attrs['fonte'] = None  # Sem fonte o cubo é montado do zero, como na primeira carga
+        return copia
+
+    def proximo_filtro():
+        limpa_caches()
+        return next(filtros)
+
+    filtrados = dados[motor.mascara(selecoes_alteradas(dados, 0))]
+
+    return {
+        'api: leitura em fluxo e normalização': (
+            lambda: normaliza(dataframe_em_fluxo(payload[inicio:inicio + config.TAMANHO_PEDACO]
+                                                 for inicio in range(0, len(payload), config.TAMANHO_PEDACO))),
+            None),
+        'dashboard: primeira execução': (
+            lambda copia: figuras_dashboard(agregados_dashboard(copia)),
+            copia_nova),
+        'dashboard: troca de filtros': (
+            lambda filtro: figuras_dashboard(agregados_dashboard(dados, *filtro)),
+            proximo_filtro),
+        'tabela: primeira execução': (
+            lambda copia: mostra_pagina_tabela(motor_filtros(copia), copia, selecoes_iniciais(copia), None),
+            copia_nova),
+        'tabela: troca de filtro ordenada': (
+            lambda numero: mostra_pagina_tabela(motor, dados, selecoes_alteradas(dados, numero), 'Preço'),
+            lambda: next(numeros) + 1),
+        'tabela: exportação csv': (lambda: exporta_csv(filtrados), None),
+        'tabela: exportação xlsx': (lambda: exporta_xlsx(filtrados), None),
+        'tabela: exportação parquet': (lambda: exporta_parquet(filtrados), None),
+    }
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = 'Latência e pico de memória do app com dados sintéticos.')
+    parser.add_argument('--linhas', type = int, nargs = '+', default = list(TAMANHOS), help = 'Tamanhos do dataset')
+    parser.add_argument('--repeticoes', type = int, default = 5, help = 'Repetições de cada cenário')
+    parser.add_argument('--cenarios', nargs = '+', default = None,
+                        help = 'Só os cenários que começam por estes prefixos (ex.: dashboard tabela:)')
+    parser.add_argument('--sem-memoria', action = 'store_true', help = 'Pula a passada com tracemalloc')
+    parser.add_argument('--json', default = None, help = 'Grava os tempos e picos brutos neste arquivo')
+    argumentos = parser.parse_args(argumentos)
+
+    resultados = {'python': platform.python_version(), 'maquina': platform.platform(),
+                  'repeticoes': argumentos.repeticoes, 'instante': time.time(), 'tamanhos': {}}
+    for n_linhas in argumentos.linhas:
+        print(f'\n{n_linhas} linhas')
+        print(f'{"cenário":<40}{"p50 ms":>10}{"p95 ms":>10}{"máx ms":>10}{"pico p50 MB":>13}{"pico p95 MB":>13}')
+        resultados['tamanhos'][n_linhas] = {}
+        for nome, (funcao, preparo) in cenarios(n_linhas).items():
+            if argumentos.cenarios and not any(nome.startswith(prefixo) for prefixo in argumentos.cenarios):
+                continue
+            tempos, picos = mede(funcao, argumentos.repeticoes, preparo, memoria = not argumentos.sem_memoria)
+            p50, p95 = percentis(tempos)
+            pico50, pico95 = percentis(picos)
+            print(f'{nome:<40}{p50 * 1000:10.1f}{p95 * 1000:10.1f}{max(tempos) * 1000:10.1f}'
+                  f'{pico50 / 2**20:13.1f}{pico95 / 2**20:13.1f}')
+            resultados['tamanhos'][n_linhas][nome] = {'tempos_s': tempos, 'picos_bytes': picos}
+
+    if argumentos.json:
+        with open(argumentos.json, 'w', encoding = 'utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii = False, indent = 2)
+        print(f'\nResultados gravados em {argumentos.json}')
+
+
+if __name__ == '__main__':
+    main()
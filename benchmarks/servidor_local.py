@@ -0,0 +1,33 @@
+# Servidor HTTP local que faz o papel da API nos benchmarks, servindo um corpo pronto
+
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+## Sobe o servidor numa thread e devolve a url; corpo é bytes ou uma função (caminho da requisição) que
+## devolve bytes ou (status HTTP, bytes)
+@contextmanager
+def servidor_local(corpo):
+    class Manipulador(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            resposta = corpo(self.path) if callable(corpo) else corpo
+            status, resposta = resposta if isinstance(resposta, tuple) else (200, resposta)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(resposta)))
+            self.end_headers()
+            self.wfile.write(resposta)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+    thread = threading.Thread(target = servidor.serve_forever, daemon = True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{servidor.server_port}/produtos'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
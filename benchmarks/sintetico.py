@@ -0,0 +1,79 @@
+# Gerador de dados sintéticos com o mesmo esquema da API labdados.com/produtos,
+# para medir o desempenho sem depender da API. Também grava o JSON da API num arquivo, que serve de
+# fixture para o snapshot local (python -m utils.snapshot --fixture):
+#     python -m benchmarks.sintetico 100000 dados.json [--semente 42]
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.regioes import REGIAO_POR_UF
+
+PRODUTOS_POR_CATEGORIA = {
+    'eletronicos': ['Celular Plus X42', 'Smart TV', 'Fone de ouvido', 'Notebook Gamer', 'Tablet ABXY'],
+    'moveis': ['Cadeira de escritório', 'Mesa de jantar', 'Sofá retrátil', 'Cômoda', 'Guarda roupas'],
+    'brinquedos': ['Carrinho controle remoto', 'Boneca bebê', 'Quebra cabeça', 'Jogo de tabuleiro'],
+    'eletrodomesticos': ['Geladeira', 'Lava louças', 'Micro-ondas', 'Fogão'],
+    'instrumentos musicais': ['Violão', 'Guitarra', 'Bateria', 'Teclado'],
+    'livros': ['Iniciando em programação', 'Dashboards com Power BI', 'Ciência de dados com python'],
+    'esporte e lazer': ['Bola de futebol', 'Bicicleta', 'Corda de pular', 'Kit halteres'],
+    'utilidades domesticas': ['Panela de pressão', 'Jogo de copos', 'Jogo de panelas', 'Copo térmico'],
+}
+
+VENDEDORES = ['Pedro Gomes', 'Beatriz Moraes', 'Thiago Silva', 'Rafael Costa', 'Juliana Costa',
+              'Mariana Ferreira', 'Isabella Pereira', 'Camila Ribeiro', 'Lucas Oliveira', 'Bruno Rodrigues']
+
+TIPOS_PAGAMENTO = ['cartao_credito', 'boleto', 'cupom', 'cartao_debito']
+
+
+## Dataframe já tratado (Data da Compra em datetime), como o carregamento entrega para as páginas
+def gera_dados(n_linhas, semente = 42):
+    rng = np.random.default_rng(semente)
+
+    produtos = [(produto, categoria) for categoria, lista in PRODUTOS_POR_CATEGORIA.items() for produto in lista]
+    indice_produto = rng.integers(0, len(produtos), n_linhas)
+
+    ufs = np.array(sorted(REGIAO_POR_UF))
+    lat_uf = rng.uniform(-30, -3, len(ufs)).round(4)
+    lon_uf = rng.uniform(-70, -35, len(ufs)).round(4)
+    indice_uf = rng.integers(0, len(ufs), n_linhas)
+
+    return pd.DataFrame({
+        'Produto': np.array([p for p, _ in produtos])[indice_produto],
+        'Categoria do Produto': np.array([c for _, c in produtos])[indice_produto],
+        'Preço': rng.uniform(10, 5000, n_linhas).round(2),
+        'Frete': rng.uniform(0, 250, n_linhas).round(2),
+        'Data da Compra': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 4 * 365, n_linhas), unit = 'D'),
+        'Vendedor': np.array(VENDEDORES)[rng.integers(0, len(VENDEDORES), n_linhas)],
+        'Local da compra': ufs[indice_uf],
+        'lat': lat_uf[indice_uf],
+        'lon': lon_uf[indice_uf],
+        'Avaliação da compra': rng.integers(1, 6, n_linhas),
+        'Tipo de pagamento': np.array(TIPOS_PAGAMENTO)[rng.integers(0, len(TIPOS_PAGAMENTO), n_linhas)],
+        'Quantidade de parcelas': rng.integers(1, 25, n_linhas),
+    })
+
+
+## Corpo JSON como a API devolve: lista de registros com a Data da Compra em '%d/%m/%Y'
+def gera_payload_json(n_linhas, semente = 42):
+    dados = gera_dados(n_linhas, semente)
+    dados['Data da Compra'] = dados['Data da Compra'].dt.strftime('%d/%m/%Y')
+    return dados.to_json(orient = 'records', force_ascii = False).encode('utf-8')
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = 'Gera um JSON sintético no formato da API de produtos.')
+    parser.add_argument('linhas', type = int, help = 'Quantidade de registros')
+    parser.add_argument('saida', help = 'Arquivo JSON de saída')
+    parser.add_argument('--semente', type = int, default = 42, help = 'Semente do gerador (mesma semente, mesmos dados)')
+    argumentos = parser.parse_args(argumentos)
+
+    payload = gera_payload_json(argumentos.linhas, argumentos.semente)
+    with open(argumentos.saida, 'wb') as arquivo:
+        arquivo.write(payload)
+    print(f'{argumentos.linhas} registros ({len(payload) / 2**20:.1f} MB) gravados em {argumentos.saida}')
+
+
+if __name__ == '__main__':
+    main()
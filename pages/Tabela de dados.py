@@ -1,30 +1,27 @@
 import streamlit as st
-import requests
-import pandas as pd
 import time
-from io import BytesIO
-import xlsxwriter
+
+from utils import instrumentacao
+from utils.carregamento import carrega_dados
+from utils.exportacao import FORMATOS, exporta, exportacao_pronta, impressao_digital
+from utils.filtros import motor_filtros
+from utils.paginacao import TAMANHOS_PAGINA, linhas_visiveis, pagina, total_paginas
+from utils.painel_debug import mostra_painel_debug
 
 
 # Funcoes para dowload de arquivos
-## Dowmload de .csv
-@st.cache_data # Decorator necessário para evitar a geração contínua de muitos arquivos iguais
-def converte_csv(df):
-    return df.to_csv(index = False).encode('utf-8')
-
-## Dowmload de .xlsx
-@st.cache_data # Decorator necessário para evitar a geração contínua de muitos arquivos iguais
-def converte_xlsx(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter', datetime_format='yyyy-mm-dd', date_format='yyyy-mm-dd') as writer:  # Para valores de datas constantes no df
-        df.to_excel(writer, index=False)   # Chamada da funcao do pandas to_excel
-        workbook = writer.book  # workbook é uma variável que representa o objeto do livro do Excel (Workbook) associado ao ExcelWriter (objeto writer).         
-        worksheet = writer.sheets['Sheet1'] # worksheet é uma variável que representa uma planilha específica dentro do livro do Excel. 
-        header_format = workbook.add_format({'border': False}) # header_format é uma variável que representa um objeto de formatação (Format) no workbook
-        for col_num, value in enumerate(df.columns.values): # Usando workbook.add_format(), criamos um novo objeto de formatação e o associamos ao workbook (livro do Excel)
-            worksheet.write(0, col_num, value, header_format)
-    output.seek(0) # mover o cursor de leitura/escrita para a posição 0 (início) no fluxo de bytes.
-    return output.getvalue()
+## Os arquivos são gerados por utils.exportacao só no clique em "Preparar" e ficam em cache pela impressão digital
+## dos filtros. Uma reexecução comum só consulta o cache: se o arquivo expirou ou foi removido, o botão
+## "Preparar" volta em vez de o arquivo ser gerado de novo sem o usuário pedir.
+def botao_download(formato, impressao, dados_filtrados):  # dados_filtrados é uma funcao, chamada só no clique em "Preparar"
+    _, rotulo, extensao, mime = FORMATOS[formato]
+    arquivo = exportacao_pronta(formato, impressao)
+    if arquivo is None:
+        if not st.button(f'Preparar {extensao.upper()}', key = f'preparar_{formato}'):
+            return
+        arquivo = exporta(formato, impressao, dados_filtrados)
+    st.download_button(rotulo, data = arquivo, file_name = f'tabela.{extensao}',
+                       mime = mime, on_click = mensagem_sucesso, key = f'download_{formato}')
 
 
 ## Mensagem de sucesso
@@ -34,13 +31,12 @@ def mensagem_sucesso():
     sucesso.empty()
 
 
-st.title('TABELA DE DADOS')
+instrumentacao.inicia_execucao('Tabela de dados')  # Medição das etapas da reexecução (só com DASHBOARD_DEBUG=1)
 
-url = 'https://labdados.com/produtos'
+st.title('TABELA DE DADOS')
 
-response = requests.get(url)
-dados = pd.DataFrame.from_dict(response.json())
-dados['Data da Compra'] = pd.to_datetime(dados['Data da Compra'], format = '%d/%m/%Y')
+# Dados completos (sem filtro de região/ano), compartilhados em cache com o Dashboard
+dados = carrega_dados()
 
 # Adicionando filtros à página de dados
 with st.expander('Colunas'):
@@ -70,32 +66,54 @@ with st.sidebar.expander('Quantidade de parcelcas'):
     qtd_parcelas = st.slider('Selecione a quantidade de parcelas', 1, 24, (1,24))
 
 # Aplicando as filtragens do sidebar do streamlit ao dataframe que é exibido
-# nome_var in @variavel do filtro and \ para saltar para outro (quando multiselect); 
-# @variavel do filtro[0] <= nome_var (com crases caso tenha espacos no nome) <= @variavel do filtro[1] quando slider
-
-query = '''
-Produto in @produtos and \
-`Categoria do Produto` in @categoria and \
-@preco[0] <= Preço <= @preco[1] and \
-@frete[0] <= Frete <= @frete[1] and \
-@data_compra[0] <= `Data da Compra` <= @data_compra[1] and \
-Vendedor in @vendedor and \
-`Local da compra` in @local and \
-@avaliacao[0] <= `Avaliação da compra` <= @avaliacao[1] and \
-`Tipo de pagamento` in @tipo_pagamento and \
-@qtd_parcelas[0] <= `Quantidade de parcelas` <= @qtd_parcelas[1]
-
-'''
-
-# Acionando os filtros
-dados_filtrados = dados.query(query)        # Para o sidebar
-dados_filtrados = dados_filtrados[colunas]  # Para o topo do dataframe (selecionar as colunas)
-
-# Mostrando o dataframe
-st.dataframe(dados_filtrados)
-
-# Inserindo um texto sobre as colunas e linhas exibidas
-st.markdown(f'A tabela possui :blue[{dados_filtrados.shape[0]}] linhas :blue[{dados_filtrados.shape[1]}] colunas.')
+# Multiselect: lista de valores aceitos; slider/date_input: tupla (início, fim), com os dois extremos inclusos.
+# O motor de filtros (utils.filtros) usa índices pré-calculados do dataset e guarda a máscara de cada predicado,
+# então mexer num widget só recalcula aquele filtro; seleções que cobrem tudo nem são aplicadas.
+
+selecoes = {
+    'Produto': produtos,
+    'Categoria do Produto': categoria,
+    'Preço': preco,
+    'Frete': frete,
+    'Data da Compra': data_compra,
+    'Vendedor': vendedor,
+    'Local da compra': local,
+    'Avaliação da compra': avaliacao,
+    'Tipo de pagamento': tipo_pagamento,
+    'Quantidade de parcelas': qtd_parcelas,
+}
+
+# Acionando os filtros (só a máscara; o dataframe filtrado completo só é montado se alguém exportar)
+motor = motor_filtros(dados)
+mascara = motor.mascara(selecoes)  # Para o sidebar
+impressao = impressao_digital(dados, selecoes, colunas)
+
+def dados_filtrados():
+    filtrados = dados if mascara is None else dados[mascara]
+    return filtrados[colunas]  # Para o topo do dataframe (selecionar as colunas)
+
+# Paginação e ordenação feitas no servidor: só a página visível vai para o navegador
+coluna_pagina, coluna_ordenacao, coluna_sentido = st.columns(3)
+with coluna_ordenacao:
+    ordenar_por = st.selectbox('Ordenar por', [None] + colunas, format_func = lambda coluna: '(sem ordenação)' if coluna is None else coluna)
+with coluna_sentido:
+    crescente = st.radio('Sentido', ['Crescente', 'Decrescente'], horizontal = True) == 'Crescente'
+posicoes = linhas_visiveis(motor, dados, mascara, impressao, ordenar_por, crescente)
+with coluna_pagina:
+    tamanho_pagina = st.selectbox('Linhas por página', TAMANHOS_PAGINA)
+    # A chave muda com os filtros e o tamanho da página, assim a numeração volta para a página 1
+    numero_pagina = st.number_input('Página', 1, total_paginas(len(posicoes), tamanho_pagina), 1, key = f'pagina_{impressao}_{tamanho_pagina}')
+
+# Mostrando a página do dataframe
+with instrumentacao.etapa('st.dataframe: página') as medida:
+    pagina_atual = pagina(dados, posicoes, colunas, tamanho_pagina, numero_pagina)
+    medida.registra(linhas = len(pagina_atual))
+    if instrumentacao.ATIVO:
+        medida.registra(bytes = int(pagina_atual.memory_usage(deep = True).sum()))
+    st.dataframe(pagina_atual)
+
+# Inserindo um texto sobre as colunas e linhas exibidas (totais da tabela filtrada, não só da página)
+st.markdown(f'A tabela possui :blue[{len(posicoes)}] linhas :blue[{len(colunas)}] colunas.')
 
 
 
@@ -107,9 +125,11 @@ coluna1, coluna2 = st.columns(2)
 
 with coluna1:
     st.markdown('**Download da tabela** :file_folder:')
-    st.download_button('Formato em CSV :page_facing_up:', data = converte_csv(dados_filtrados), file_name = 'tabela.csv', mime = 'text/csv', on_click = mensagem_sucesso)  
-    st.download_button('Formato em XSLS :page_with_curl:', data=converte_xlsx(dados_filtrados), file_name='tabela.xlsx',
-                        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', on_click=mensagem_sucesso)
+    for formato in FORMATOS:
+        botao_download(formato, impressao, dados_filtrados)
+
+# Painel de desempenho da reexecução (só com DASHBOARD_DEBUG=1)
+mostra_painel_debug()
 
 # Formatação dando ao usuário opção de renomear o arquivo
 
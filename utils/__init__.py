@@ -0,0 +1 @@
+# Módulos compartilhados entre as páginas do dashboard (carregamento, tratamento e agregação dos dados)
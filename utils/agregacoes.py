@@ -0,0 +1,137 @@
+# Agregações usadas pelos gráficos do Dashboard.
+# Cada dimensão (estado, mês, categoria, vendedor) é agrupada uma única vez com soma e contagem juntas,
+# no lugar dos groupby(...).sum() e groupby(...).count() separados que varriam o dataframe umas dez vezes.
+# As colunas de texto chegam como category (utils.esquema), por isso observed=True: sem ele o groupby
+# devolveria também os estados/vendedores fora do filtro, com soma zero.
+#
+# No Dashboard as tabelas saem de fatias do cubo mensal (utils.cubo), montado uma vez por dataset:
+# trocar região, ano ou vendedores só soma as células do cubo, sem varrer as linhas de novo.
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils import config
+from utils.cache import CacheTTL
+from utils.cubo import cubo_do_dataset, fatia_dashboard
+from utils.instrumentacao import instrumenta
+from utils.memo import memo_por_objeto, versao
+
+COLUNA_VALOR = 'Preço'
+
+
+## Resultado das agregações, com as tabelas no mesmo formato que os gráficos já usavam
+@dataclass
+class Agregados:
+    receita_total: float
+    quantidade_vendas: int
+    estados: pd.DataFrame     # índice 'Local da compra'; colunas lat, lon, sum, count
+    mensal: pd.DataFrame      # colunas 'Data da Compra', sum, count, Ano, Mês
+    categorias: pd.DataFrame  # índice 'Categoria do Produto'; colunas sum, count
+    vendedores: pd.DataFrame  # índice 'Vendedor'; colunas sum, count
+
+    def _por_estado(self, medida):
+        tabela = self.estados[['lat', 'lon', medida]].rename(columns = {medida: COLUNA_VALOR})
+        return tabela.sort_values(COLUNA_VALOR, ascending=False).reset_index()
+
+    def _mensal(self, medida):
+        return self.mensal[['Data da Compra', medida, 'Ano', 'Mês']].rename(columns = {medida: COLUNA_VALOR})
+
+    def _por_categoria(self, medida):
+        return self.categorias[[medida]].rename(columns = {medida: COLUNA_VALOR}).sort_values(COLUNA_VALOR, ascending=False)
+
+    # ------ Tabelas de RECEITAS ------ #
+    @property
+    def receita_estados(self):
+        return self._por_estado('sum')
+
+    @property
+    def receita_mensal(self):
+        return self._mensal('sum')
+
+    @property
+    def receita_categorias(self):
+        return self._por_categoria('sum')
+
+    # ------ Tabelas de VENDAS ------ #
+    @property
+    def vendas_estados(self):
+        return self._por_estado('count')
+
+    @property
+    def venda_mensal(self):
+        return self._mensal('count')
+
+    @property
+    def vendas_categorias(self):
+        return self._por_categoria('count')
+
+
+## Latitude e longitude de cada estado, calculadas uma vez por dataset carregado
+@memo_por_objeto
+def tabela_estados(dados):
+    return dados.drop_duplicates(subset = 'Local da compra').set_index('Local da compra')[['lat', 'lon']]
+
+
+def _rotula_meses(mensal):
+    mensal['Ano'] = mensal['Data da Compra'].dt.year
+    mensal['Mês'] = mensal['Data da Compra'].dt.month_name()
+    return mensal
+
+
+## Funcao que calcula todas as tabelas do Dashboard com um agg (soma e contagem) por dimensão
+def agrega(dados, coordenadas = None):
+    if coordenadas is None:
+        coordenadas = tabela_estados(dados)
+    valor = dados[COLUNA_VALOR]
+
+    estados = valor.groupby(dados['Local da compra'], observed = True).agg(['sum', 'count'])
+    estados = coordenadas.join(estados, how = 'inner')
+
+    mensal = _rotula_meses(dados.groupby(pd.Grouper(key = 'Data da Compra', freq = 'M'))[COLUNA_VALOR].agg(['sum', 'count']).reset_index())
+
+    categorias = valor.groupby(dados['Categoria do Produto'], observed = True).agg(['sum', 'count'])
+    vendedores = valor.groupby(dados['Vendedor'], observed = True).agg(['sum', 'count'])
+
+    return Agregados(receita_total = valor.sum(),
+                     quantidade_vendas = len(dados),
+                     estados = estados,
+                     mensal = mensal,
+                     categorias = categorias,
+                     vendedores = vendedores)
+
+
+## Agregados a partir de uma fatia do cubo mensal (utils.cubo), sem varrer as linhas do dataset
+@instrumenta('agregados: fatia do cubo')
+def agrega_cubo(fatia, coordenadas):
+    # Como o pd.Grouper(freq='M'), a série mensal vai do primeiro ao último mês, com zero nos meses sem venda
+    meses = fatia.por('Mês')
+    if len(meses):
+        meses = meses.reindex(pd.period_range(meses.index.min(), meses.index.max(), freq = 'M'), fill_value = 0)
+        meses.index = meses.index.to_timestamp(how = 'end').normalize()  # Rótulo no último dia do mês, como o Grouper
+    else:
+        meses.index = pd.DatetimeIndex([])
+    mensal = _rotula_meses(meses.rename_axis('Data da Compra').reset_index())
+
+    receita_total, quantidade_vendas = fatia.totais()
+    return Agregados(receita_total = receita_total,
+                     quantidade_vendas = quantidade_vendas,
+                     estados = coordenadas.join(fatia.por('Local da compra'), how = 'inner'),
+                     mensal = mensal,
+                     categorias = fatia.por('Categoria do Produto'),
+                     vendedores = fatia.por('Vendedor'))
+
+
+_cache_agregados = CacheTTL(config.CACHE_MAX_AGREGADOS, float('inf'))
+
+
+## Vendedores com vendas na região/ano, para as opções do filtro
+def vendedores_disponiveis(dados_base, regiao = '', ano = ''):
+    return list(fatia_dashboard(cubo_do_dataset(dados_base), regiao, ano).por('Vendedor').index)
+
+
+## Agregados do Dashboard guardados por (versão do dataset, região, ano, vendedores selecionados)
+def agregados_dashboard(dados_base, regiao = '', ano = '', vendedores = ()):
+    chave = (versao(dados_base), regiao, ano, frozenset(vendedores))
+    return _cache_agregados.obtem(chave, lambda: agrega_cubo(fatia_dashboard(cubo_do_dataset(dados_base), regiao, ano, list(vendedores)),
+                                                              tabela_estados(dados_base)))
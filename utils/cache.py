@@ -0,0 +1,87 @@
+# Cache em memória com tempo de vida (TTL) e remoção da entrada menos usada (LRU), compartilhado pelas
+# sessões do servidor. Usado para os dados carregados e para as agregações derivadas deles.
+
+import threading
+import time
+from collections import OrderedDict
+
+
+## Cache com tempo de vida (TTL) e remoção da entrada menos usada (LRU)
+class CacheTTL:
+
+    def __init__(self, max_entradas, ttl):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # chave -> (instante da carga, valor), da menos para a mais usada
+        self._trava = threading.Lock()
+        self._travas_chave = {}         # Evita que duas sessões baixem a mesma chave ao mesmo tempo
+        self.acertos = 0
+        self.falhas = 0
+        self.expiradas = 0
+        self.removidas = 0
+
+    def _busca(self, chave):
+        # Precisa ser chamado com self._trava adquirida
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        if time.monotonic() - entrada[0] >= self.ttl:
+            del self._entradas[chave]
+            self.expiradas += 1
+            return None
+        self._entradas.move_to_end(chave)
+        return entrada
+
+    def obtem(self, chave, carrega):
+        with self._trava:
+            entrada = self._busca(chave)
+            if entrada is not None:
+                self.acertos += 1
+                return entrada[1]
+            trava_chave = self._travas_chave.setdefault(chave, threading.Lock())
+
+        with trava_chave:
+            # Outra sessão pode ter carregado a chave enquanto esperávamos
+            with self._trava:
+                entrada = self._busca(chave)
+                if entrada is not None:
+                    self.acertos += 1
+                    return entrada[1]
+                self.falhas += 1
+            valor = carrega()
+            self.guarda(chave, valor)
+        return valor
+
+    ## Valor guardado para a chave, ou None quando não está no cache (não carrega nada)
+    def consulta(self, chave):
+        with self._trava:
+            entrada = self._busca(chave)
+            if entrada is None:
+                return None
+            self.acertos += 1
+            return entrada[1]
+
+    def guarda(self, chave, valor):
+        with self._trava:
+            self._entradas[chave] = (time.monotonic(), valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                chave_antiga, _ = self._entradas.popitem(last=False)
+                self._travas_chave.pop(chave_antiga, None)
+                self.removidas += 1
+
+    def limpa(self):
+        with self._trava:
+            self._entradas.clear()
+
+    def estatisticas(self):
+        agora = time.monotonic()
+        with self._trava:
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'expiradas': self.expiradas,
+                'removidas': self.removidas,
+                'entradas': [{'chave': chave, 'idade_s': round(agora - instante, 1)}
+                             for chave, (instante, _) in self._entradas.items()],
+            }
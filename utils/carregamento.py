@@ -0,0 +1,207 @@
+# Carregamento dos dados da API compartilhado pelas páginas.
+# O módulo fica importado entre as reexecuções do Streamlit, então o cache abaixo vale para todas as
+# sessões do servidor: cada combinação (regiao, ano) só é baixada uma vez enquanto não expirar.
+# Os dados completos (sem filtro) vêm do snapshot Parquet local (utils.snapshot), que é atualizado
+# a partir da API, em segundo plano, quando fica mais velho que DASHBOARD_SNAPSHOT_MAX_IDADE.
+# ATENÇÃO: o DataFrame devolvido é compartilhado, as páginas não devem alterá-lo no lugar.
+# O requests só é importado quando uma requisição é de fato feita: com o snapshot em dia, a primeira
+# tela não paga o custo de importá-lo.
+
+import logging
+import threading
+import time
+
+from utils import config
+from utils.cache import CacheTTL
+from utils.esquema import normaliza, relatorio_memoria
+from utils.ingestao import dataframe_em_fluxo
+from utils.instrumentacao import etapa
+from utils.memo import versao
+from utils.snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+
+
+_cache = CacheTTL(config.CACHE_MAX_ENTRADAS, config.CACHE_TTL)
+# Vindos da API, os dados ficam no _cache completos por (regiao, ano) e as colunas pedidas por cada página
+# são recortadas deles aqui, assim duas páginas com colunas diferentes não baixam a mesma combinação duas vezes
+_projecoes = CacheTTL(config.CACHE_MAX_ENTRADAS, config.CACHE_TTL)
+_memoria = {}  # chave do cache -> uso de memória estimado no caminho antigo / normalizado
+
+_sessao = None
+_trava_sessao = threading.Lock()
+
+
+## Session única com pool de conexões, reaproveitando a conexão TCP/TLS entre as requisições
+def sessao():
+    global _sessao
+    with _trava_sessao:
+        if _sessao is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=config.POOL_CONEXOES, pool_maxsize=config.POOL_CONEXOES)
+            _sessao.mount('http://', adaptador)
+            _sessao.mount('https://', adaptador)
+        return _sessao
+
+
+## Chave do cache: a API recebe a região em minúsculas e o ano como texto ('' para sem filtro);
+## colunas=None significa todas as colunas (as colunas só entram na chave na leitura do snapshot)
+def chave_dados(regiao = '', ano = '', colunas = None):
+    return (regiao.lower(), str(ano), tuple(colunas) if colunas else None)
+
+
+## Baixa e trata os dados da API, sem passar pelo cache.
+## O corpo é lido em fluxo (utils.ingestao): os registros vão direto para colunas tipadas, sem montar a lista de dicts.
+## prazo (segundos) limita o tempo total da requisição, não só a espera por cada pedaço.
+def baixa_dados(regiao = '', ano = '', url = None, prazo = None):
+    query_string = {'regiao': regiao, 'ano': ano}
+    with etapa(f'api: download e leitura em fluxo ({regiao or "brasil"}/{ano or "todos"})') as medida:
+        with sessao().get(url or config.URL_API, params = query_string, timeout = config.TIMEOUT_API, stream = True) as response:
+            response.raise_for_status()
+            pedacos = response.iter_content(chunk_size = config.TAMANHO_PEDACO)
+            if prazo is not None:
+                pedacos = _com_prazo(pedacos, time.monotonic() + prazo)
+            dados = dataframe_em_fluxo(_conta_bytes(pedacos, medida))
+        medida.registra(linhas = len(dados))
+    with etapa('normalização do esquema'):
+        dados = normaliza(dados)  # Numéricas reduzidas (as de texto já chegam como category)
+    return dados
+
+
+def _conta_bytes(pedacos, medida):
+    total = 0
+    for pedaco in pedacos:
+        total += len(pedaco)
+        yield pedaco
+    medida.registra(bytes = total)
+
+
+def _com_prazo(pedacos, limite):
+    import requests
+    for pedaco in pedacos:
+        if time.monotonic() > limite:
+            raise requests.Timeout('Prazo da requisição esgotado')
+        yield pedaco
+
+
+## Lê um arquivo JSON local no formato da API (usado para testar offline), pelo mesmo caminho em fluxo
+def le_fixture(caminho):
+    with open(caminho, 'rb') as arquivo:
+        return normaliza(dataframe_em_fluxo(iter(lambda: arquivo.read(config.TAMANHO_PEDACO), b'')))
+
+
+# Só uma thread por vez cria ou confere o snapshot com a API
+_trava_snapshot = threading.Lock()
+
+# Estado da atualização em segundo plano: se há uma em andamento e quando a próxima pode ser tentada
+# depois de uma falha (espera dobrando a cada falha seguida, até DASHBOARD_SNAPSHOT_MAX_IDADE)
+_trava_atualizacao = threading.Lock()
+_atualizando = False
+_falhas_seguidas = 0
+_proxima_tentativa = 0.0
+
+
+def _atualiza_snapshot(snapshot):
+    global _atualizando, _falhas_seguidas, _proxima_tentativa
+    falhou = True
+    try:
+        with _trava_snapshot:
+            snapshot.atualiza(baixa_dados())
+        falhou = False
+    except Exception:  # API fora do ar, corpo malformado, erro ao gravar o Parquet...: fica o snapshot atual
+        logger.warning('Falha ao atualizar o snapshot a partir da API', exc_info = True)
+    finally:
+        # Sempre libera a próxima atualização, senão uma falha inesperada a travaria até o servidor reiniciar
+        with _trava_atualizacao:
+            if falhou:
+                _falhas_seguidas += 1
+                espera = min(config.SNAPSHOT_ESPERA_FALHA * 2 ** (_falhas_seguidas - 1), config.SNAPSHOT_MAX_IDADE)
+                _proxima_tentativa = time.monotonic() + espera
+            else:
+                _falhas_seguidas = 0
+            _atualizando = False
+
+
+## Dispara a atualização numa thread, se não houver outra em andamento nem uma falha recente
+def _agenda_atualizacao(snapshot):
+    global _atualizando
+    with _trava_atualizacao:
+        if _atualizando or time.monotonic() < _proxima_tentativa:
+            return
+        _atualizando = True
+    threading.Thread(target = _atualiza_snapshot, args = (snapshot,), name = 'atualiza-snapshot', daemon = True).start()
+
+
+## Dados completos a partir do snapshot Parquet. Só a primeira carga (sem snapshot no disco) espera a API;
+## um snapshot velho é servido na hora e atualizado em segundo plano, e as próximas cargas já leem a versão nova.
+def _carrega_do_snapshot(colunas):
+    snapshot = Snapshot()
+    if not snapshot.existe():
+        with _trava_snapshot:
+            if not snapshot.existe():
+                snapshot.grava(baixa_dados())
+    elif snapshot.idade() > config.SNAPSHOT_MAX_IDADE:
+        _agenda_atualizacao(snapshot)
+    with etapa('snapshot: leitura do parquet') as medida:
+        dados = snapshot.le(colunas)
+        medida.registra(linhas = len(dados), colunas = len(dados.columns))
+    return dados
+
+
+def _do_snapshot(regiao, ano):
+    return config.SNAPSHOT_ATIVO and not regiao and not ano
+
+
+def _carrega(regiao, ano, colunas, prazo = None):
+    if _do_snapshot(regiao, ano):
+        dados = _carrega_do_snapshot(colunas)
+    else:
+        dados = baixa_dados(regiao, ano, prazo = prazo)
+    # Identifica de onde vieram os dados, para estruturas derivadas (como o cubo mensal) serem
+    # atualizadas de forma incremental quando uma nova versão da mesma fonte é carregada
+    dados.attrs['fonte'] = (regiao, ano, colunas)
+    dados.attrs['so_acrescenta'] = _do_snapshot(regiao, ano)  # O snapshot só acrescenta linhas, a API pode mudar as antigas
+    relatorio = _memoria[(regiao, ano, colunas)] = relatorio_memoria(dados)
+    logger.info('Dados carregados (%s/%s): %.1f MB no caminho antigo (estimativa) -> %.1f MB',
+                regiao or 'brasil', ano or 'todos', relatorio['antes_mb'], relatorio['depois_mb'])
+    return dados
+
+
+def _projeta(completos, chave):
+    projetados = completos[list(chave[2])]
+    projetados.attrs = {**completos.attrs, 'fonte': chave}  # Dicionário novo, para não alterar o dos completos
+    return projetados
+
+
+## Funcao usada pelas páginas: devolve os dados da (regiao, ano), baixando só quando não estão no cache.
+## Passar as colunas usadas pela página evita manter em memória (e ler do snapshot) as que ela não usa.
+def carrega_dados(regiao = '', ano = '', colunas = None, prazo = None):
+    if _do_snapshot(regiao, ano):
+        chave = chave_dados(regiao, ano, colunas)  # O Parquet lê só as colunas pedidas
+        return _cache.obtem(chave, lambda: _carrega(*chave, prazo = prazo))
+    chave = chave_dados(regiao, ano)
+    completos = _cache.obtem(chave, lambda: _carrega(*chave, prazo = prazo))
+    if not colunas:
+        return completos
+    chave_projecao = chave_dados(regiao, ano, colunas)
+    # A versão dos completos entra na chave: quando eles são baixados de novo, o recorte também é refeito
+    return _projecoes.obtem((chave_projecao, versao(completos)), lambda: _projeta(completos, chave_projecao))
+
+
+## Baixa de novo a (regiao, ano) da API e troca a entrada do cache antes de ela expirar; até a troca, as páginas
+## continuam com a versão atual. Os dados completos vêm do snapshot, que tem a sua própria atualização.
+def recarrega_dados(regiao = '', ano = '', prazo = None):
+    if _do_snapshot(regiao, ano):
+        return
+    chave = chave_dados(regiao, ano)
+    _cache.guarda(chave, _carrega(*chave, prazo = prazo))
+
+
+## Acertos, falhas e idade das entradas, para acompanhar o cache funcionando
+def estatisticas_cache():
+    estatisticas = _cache.estatisticas()
+    for entrada in estatisticas['entradas']:
+        entrada['memoria'] = _memoria.get(entrada['chave'])
+    return estatisticas
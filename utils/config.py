@@ -0,0 +1,56 @@
+# Configurações do app lidas de variáveis de ambiente, assim é possível ajustar o comportamento
+# em produção sem editar o código das páginas
+
+import os
+
+## API de produtos
+URL_API = os.environ.get('DASHBOARD_URL_API', 'https://labdados.com/produtos')
+TIMEOUT_API = float(os.environ.get('DASHBOARD_TIMEOUT_API', 30))  # Segundos
+POOL_CONEXOES = int(os.environ.get('DASHBOARD_POOL_CONEXOES', 10))  # Conexões mantidas abertas pela Session
+
+## Cache dos dados carregados
+CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', 600))  # Segundos até uma entrada ser considerada velha
+CACHE_MAX_ENTRADAS = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRADAS', 32))  # Acima disso, remove a menos usada
+
+## Filtragem de região/ano: por padrão o dataset completo é baixado uma vez e filtrado em memória.
+## Com DASHBOARD_FILTRO_NA_API=1 volta ao modo antigo, em que cada filtro vira uma requisição à API.
+FILTRO_NA_API = os.environ.get('DASHBOARD_FILTRO_NA_API', '0') == '1'
+
+## Colunas numéricas com tipos do pyarrow (DASHBOARD_BACKEND_ARROW=1) em vez dos tipos numpy
+BACKEND_ARROW = os.environ.get('DASHBOARD_BACKEND_ARROW', '0') == '1'
+
+## Snapshot Parquet local dos dados completos (DASHBOARD_SNAPSHOT=0 desliga e volta a ler sempre da API)
+SNAPSHOT_ATIVO = os.environ.get('DASHBOARD_SNAPSHOT', '1') == '1'
+DIRETORIO_SNAPSHOT = os.environ.get('DASHBOARD_DIRETORIO_SNAPSHOT',
+                                    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.snapshot'))
+SNAPSHOT_MAX_IDADE = float(os.environ.get('DASHBOARD_SNAPSHOT_MAX_IDADE', 3600))  # Segundos até conferir a API de novo
+SNAPSHOT_ESPERA_FALHA = float(os.environ.get('DASHBOARD_SNAPSHOT_ESPERA_FALHA', 60))  # Segundos até tentar de novo após uma falha (dobra a cada falha)
+
+## Tamanho dos pedaços (bytes) lidos do corpo da resposta na leitura em fluxo
+TAMANHO_PEDACO = int(os.environ.get('DASHBOARD_TAMANHO_PEDACO', 64 * 1024))
+
+## Agregações do Dashboard guardadas por (versão do dataset, região, ano, vendedores selecionados)
+CACHE_MAX_AGREGADOS = int(os.environ.get('DASHBOARD_CACHE_MAX_AGREGADOS', 128))
+
+## Figuras do plotly guardadas pelo hash da tabela de entrada e parâmetros
+CACHE_MAX_FIGURAS = int(os.environ.get('DASHBOARD_CACHE_MAX_FIGURAS', 256))
+
+## Arquivos exportados (CSV/XLSX/Parquet) guardados pela impressão digital dos filtros
+CACHE_MAX_EXPORTACOES = int(os.environ.get('DASHBOARD_CACHE_MAX_EXPORTACOES', 8))
+
+## Posições das linhas da Tabela de dados por (filtros, ordenação): cada entrada é um array int64 do tamanho
+## do dataset (8 MB por milhão de linhas), por isso o limite é bem menor que o do cache de dados
+CACHE_MAX_PAGINACAO = int(os.environ.get('DASHBOARD_CACHE_MAX_PAGINACAO', 4))
+
+## Pré-carregamento das partições região/ano no modo FILTRO_NA_API
+PREFETCH_PARALELO = int(os.environ.get('DASHBOARD_PREFETCH_PARALELO', 6))    # Requisições simultâneas
+PREFETCH_TENTATIVAS = int(os.environ.get('DASHBOARD_PREFETCH_TENTATIVAS', 3))
+PREFETCH_PRAZO = float(os.environ.get('DASHBOARD_PREFETCH_PRAZO', 60))       # Segundos por partição (cada tentativa)
+PREFETCH_INTERVALO = float(os.environ.get('DASHBOARD_PREFETCH_INTERVALO', 0.75 * CACHE_TTL))  # Segundos entre as recargas, antes do TTL vencer
+
+## Instrumentação das reexecuções (DASHBOARD_DEBUG=1 mostra o painel e grava o log de desempenho)
+DEBUG = os.environ.get('DASHBOARD_DEBUG', '0') == '1'
+DEBUG_MEMORIA = DEBUG and os.environ.get('DASHBOARD_DEBUG_MEMORIA', '0') == '1'  # Pico de memória por etapa (tracemalloc, mais lento)
+ARQUIVO_LOG_DESEMPENHO = os.environ.get('DASHBOARD_LOG_DESEMPENHO', 'desempenho.jsonl')
+LOG_DESEMPENHO_MAX_BYTES = int(os.environ.get('DASHBOARD_LOG_DESEMPENHO_MAX_BYTES', 5 * 2**20))
+LOG_DESEMPENHO_ARQUIVOS = int(os.environ.get('DASHBOARD_LOG_DESEMPENHO_ARQUIVOS', 3))
@@ -0,0 +1,99 @@
+# Cubo mensal pré-agregado: soma e contagem do Preço por mês x estado x categoria x vendedor.
+# É montado uma vez por dataset e tem poucas células (meses x estados x categorias x vendedores), então
+# as séries mensais, os mapas por estado e as barras por categoria saem de fatias do cubo, sem varrer as linhas.
+# Quando chegam linhas novas (atualização do snapshot), só os meses a partir da marca d'água anterior são refeitos.
+
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from utils.instrumentacao import etapa
+from utils.memo import versao
+from utils.regioes import ufs_da_regiao
+
+COLUNA_VALOR = 'Preço'
+DIMENSOES = ('Mês', 'Local da compra', 'Categoria do Produto', 'Vendedor')
+
+
+class CuboMensal:
+
+    def __init__(self, celulas):
+        self.celulas = celulas  # Uma linha por combinação presente das DIMENSOES, com as colunas sum e count
+
+    @classmethod
+    def de_dados(cls, dados):
+        chaves = [dados['Data da Compra'].dt.to_period('M').rename('Mês'),
+                  dados['Local da compra'], dados['Categoria do Produto'], dados['Vendedor']]
+        celulas = dados[COLUNA_VALOR].groupby(chaves, observed = True).agg(['sum', 'count']).reset_index()
+        return cls(celulas)
+
+    ## Novo cubo com os meses a partir de 'desde' refeitos a partir dos dados; os meses anteriores são mantidos
+    def atualiza(self, dados, desde):
+        mes_inicial = pd.Period(desde, freq = 'M')
+        mantidas = self.celulas[self.celulas['Mês'] < mes_inicial]
+        refeitas = CuboMensal.de_dados(dados[dados['Data da Compra'] >= mes_inicial.start_time]).celulas
+        celulas = pd.concat([mantidas, refeitas], ignore_index = True)
+        # O concat de colunas category com categorias diferentes volta para object
+        celulas = celulas.astype({dimensao: 'category' for dimensao in DIMENSOES[1:]})
+        return CuboMensal(celulas)
+
+    ## Fatia do cubo por estados, ano e vendedores (None = sem filtro)
+    def fatia(self, ufs = None, ano = None, vendedores = None):
+        mascara = pd.Series(True, index = self.celulas.index)
+        if ufs is not None:
+            mascara &= self.celulas['Local da compra'].isin(ufs)
+        if ano is not None:
+            mascara &= self.celulas['Mês'].dt.year == int(ano)
+        if vendedores:
+            mascara &= self.celulas['Vendedor'].isin(vendedores)
+        return CuboMensal(self.celulas[mascara])
+
+    ## Soma e contagem por uma das DIMENSOES
+    def por(self, dimensao):
+        return self.celulas.groupby(dimensao, observed = True)[['sum', 'count']].sum()
+
+    def totais(self):
+        return self.celulas['sum'].sum(), int(self.celulas['count'].sum())
+
+
+@dataclass
+class _Registro:
+    versao: int
+    linhas: int
+    marca_dagua: pd.Timestamp
+    cubo: CuboMensal
+
+
+_cubos = {}  # fonte dos dados -> último cubo montado para ela
+_trava = threading.Lock()
+
+
+## Cubo de um dataset carregado. Para uma nova versão da mesma fonte, o cubo anterior só é atualizado a partir
+## do mês da marca d'água anterior quando a fonte garante que as linhas antigas não mudam (attrs['so_acrescenta'],
+## marcado pelo carregamento nos dados do snapshot, que só mescla as linhas novas). Uma nova leitura da API pode
+## ter mudado qualquer linha antiga, então nesse caso o cubo é montado do zero.
+def cubo_do_dataset(dados):
+    fonte = dados.attrs.get('fonte')
+    versao_dados = versao(dados)
+    with _trava:
+        registro = _cubos.get(fonte)
+    if registro is not None and registro.versao == versao_dados:
+        return registro.cubo
+
+    marca_dagua = dados['Data da Compra'].max()
+    if (registro is not None and fonte is not None and dados.attrs.get('so_acrescenta')
+            and len(dados) >= registro.linhas and marca_dagua >= registro.marca_dagua):
+        with etapa('cubo: atualização incremental'):
+            cubo = registro.cubo.atualiza(dados, registro.marca_dagua)
+    else:
+        with etapa('cubo: montagem'):
+            cubo = CuboMensal.de_dados(dados)
+    with _trava:
+        _cubos[fonte] = _Registro(versao_dados, len(dados), marca_dagua, cubo)
+    return cubo
+
+
+## Fatia do cubo com os filtros do Dashboard (região pelo nome, ano como no slider, '' = sem filtro)
+def fatia_dashboard(cubo, regiao = '', ano = '', vendedores = None):
+    return cubo.fatia(ufs_da_regiao(regiao), int(ano) if ano != '' else None, vendedores)
@@ -0,0 +1,83 @@
+# Esquema dos dados da API e normalização para uma representação colunar compacta.
+# As colunas de texto têm poucos valores distintos e viram category; as inteiras são reduzidas
+# ao menor tipo que comporta os valores e as decimais ficam em float64. O dataframe continua funcionando com groupby, isin e query.
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils import config
+
+## Tipo de cada coluna conhecida da API. Os valores em reais ('Preço', 'Frete') e as coordenadas ficam em float64:
+## o float32 não guarda os centavos (182.92 viraria 182.919998 na tabela e nas exportações).
+## VERSAO_ESQUEMA muda junto com os tipos, para o snapshot local gravado com os tipos antigos ser recriado.
+VERSAO_ESQUEMA = 2
+
+ESQUEMA = {
+    'Produto': 'category',
+    'Categoria do Produto': 'category',
+    'Preço': 'float64',
+    'Frete': 'float64',
+    'Vendedor': 'category',
+    'Local da compra': 'category',
+    'lat': 'float64',
+    'lon': 'float64',
+    'Avaliação da compra': 'int8',
+    'Tipo de pagamento': 'category',
+    'Quantidade de parcelas': 'int8',
+}
+
+# Equivalentes em pyarrow para as colunas numéricas, usados com DASHBOARD_BACKEND_ARROW=1
+_TIPOS_ARROW = {
+    'float64': 'double[pyarrow]',
+    'int8': 'int8[pyarrow]',
+}
+
+
+## Memória ocupada pelo dataframe em bytes (deep=True conta o conteúdo das strings)
+def uso_memoria(dados):
+    return int(dados.memory_usage(deep = True).sum())
+
+
+## Estimativa da memória do dataframe como o caminho antigo (json() + DataFrame.from_dict) o montava: texto em
+## object (8 bytes do ponteiro por linha mais o tamanho de cada string) e números em 64 bits.
+## Não depende da normalização já ter sido feita, então vale também para os dados lidos do snapshot.
+def uso_memoria_original(dados):
+    total = uso_memoria(dados)
+    for coluna in dados.columns:
+        serie = dados[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # O código -1 (vazio) pega a última posição, o tamanho do NaN que o from_dict guardaria
+            tamanhos = np.array([sys.getsizeof(valor) for valor in serie.cat.categories] + [sys.getsizeof(float('nan'))])
+            original = 8 * len(serie) + int(tamanhos[serie.cat.codes.to_numpy()].sum())
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            original = 8 * len(serie)
+        else:
+            continue
+        total += original - int(serie.memory_usage(deep = True, index = False))
+    return total
+
+
+## Uso de memória em MB: a estimativa do caminho antigo ('antes') e o do dataframe normalizado ('depois')
+def relatorio_memoria(dados):
+    return {'antes_mb': round(uso_memoria_original(dados) / 2**20, 1), 'depois_mb': round(uso_memoria(dados) / 2**20, 1)}
+
+
+def _tipo_coluna(serie, tipo, arrow):
+    if tipo == 'category':
+        return tipo
+    if arrow:
+        return _TIPOS_ARROW[tipo]
+    if tipo.startswith('int') and serie.isna().any():
+        return tipo.capitalize()  # Inteiro com valores faltantes usa o tipo anulável do pandas (Int8)
+    return tipo
+
+
+## Aplica o ESQUEMA às colunas presentes; colunas desconhecidas ficam como vieram
+def normaliza(dados, arrow = None):
+    if arrow is None:
+        arrow = config.BACKEND_ARROW
+    tipos = {coluna: _tipo_coluna(dados[coluna], tipo, arrow)
+             for coluna, tipo in ESQUEMA.items() if coluna in dados.columns}
+    return dados.astype(tipos)
@@ -0,0 +1,89 @@
+# Exportação da tabela filtrada em CSV, XLSX e Parquet.
+# Os arquivos só são gerados quando o usuário pede e ficam em cache pela impressão digital do estado dos
+# filtros (versão do dataset + seleções + colunas), em vez do hash do dataframe filtrado inteiro.
+
+import hashlib
+from io import BytesIO
+
+import pandas as pd
+
+from utils import config
+from utils.cache import CacheTTL
+from utils.instrumentacao import etapa
+from utils.memo import versao
+
+
+## Dowmload de .csv
+def exporta_csv(dados):
+    return dados.to_csv(index = False).encode('utf-8')
+
+
+## Dowmload de .xlsx
+## O xlsxwriter em modo constant_memory grava linha a linha num arquivo temporário, sem montar a planilha
+## inteira em memória; por isso as linhas são escritas em ordem, direto do dataframe.
+def exporta_xlsx(dados):
+    import xlsxwriter  # Só é carregado quando alguém pede o .xlsx
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True,
+                                            'default_date_format': 'yyyy-mm-dd'})  # Para valores de datas constantes no df
+    worksheet = workbook.add_worksheet('Sheet1')
+    worksheet.write_row(0, 0, [str(coluna) for coluna in dados.columns])  # Cabeçalho no formato padrão, sem borda
+    # Vazios (NaN, NaT, pd.NA) viram None, que o xlsxwriter grava como célula em branco, como o to_excel fazia.
+    # Só as colunas que têm algum vazio são conferidas célula a célula.
+    com_vazios = [posicao for posicao, vazio in enumerate(dados.isna().any().to_numpy()) if vazio]
+    for linha, valores in enumerate(dados.itertuples(index = False, name = None), start = 1):
+        if com_vazios:
+            valores = list(valores)
+            for posicao in com_vazios:
+                if pd.isna(valores[posicao]):
+                    valores[posicao] = None
+        worksheet.write_row(linha, 0, valores)
+    workbook.close()
+    return output.getvalue()
+
+
+## Dowmload de .parquet (bem mais rápido e menor que os outros dois)
+def exporta_parquet(dados):
+    output = BytesIO()
+    dados.to_parquet(output, index = False)
+    return output.getvalue()
+
+
+## Formato -> (funcao, rótulo do botão, extensão, mime)
+FORMATOS = {
+    'csv': (exporta_csv, 'Formato em CSV :page_facing_up:', 'csv', 'text/csv'),
+    'xlsx': (exporta_xlsx, 'Formato em XSLS :page_with_curl:', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': (exporta_parquet, 'Formato em Parquet :package:', 'parquet', 'application/vnd.apache.parquet'),
+}
+
+_cache = CacheTTL(config.CACHE_MAX_EXPORTACOES, config.CACHE_TTL)
+
+
+def _normaliza_selecao(selecao):
+    if isinstance(selecao, (list, set, frozenset)):
+        return tuple(sorted(map(str, selecao)))  # A ordem dos itens do multiselect não muda o resultado
+    return tuple(map(str, selecao))
+
+
+## Impressão digital barata do que está na tela: não depende do tamanho do dataframe filtrado
+def impressao_digital(dados, selecoes, colunas):
+    estado = (versao(dados),
+              tuple(sorted((coluna, _normaliza_selecao(selecao)) for coluna, selecao in selecoes.items())),
+              tuple(colunas))
+    return hashlib.blake2b(repr(estado).encode('utf-8'), digest_size = 16).hexdigest()
+
+
+## Arquivo exportado para a impressão digital, gerado só na primeira vez que é pedido.
+## dados_filtrados é uma funcao que monta o dataframe, assim ele nem é montado quando o arquivo está em cache.
+def exporta(formato, impressao, dados_filtrados):
+    funcao = FORMATOS[formato][0]
+    with etapa(f'exportação: {formato}') as medida:
+        arquivo = _cache.obtem((impressao, formato), lambda: funcao(dados_filtrados()))
+        medida.registra(bytes = len(arquivo))
+    return arquivo
+
+
+## Arquivo já exportado para a impressão digital, ou None se ainda não foi pedido (ou saiu do cache)
+def exportacao_pronta(formato, impressao):
+    return _cache.consulta((impressao, formato))
@@ -0,0 +1,141 @@
+# Filtros da Tabela de dados com índices pré-calculados.
+# Para as colunas de texto guarda os códigos de categoria; para as numéricas e de data, a ordem de
+# classificação (argsort) e os valores ordenados, assim um intervalo vira duas buscas binárias.
+# Cada predicado tem sua máscara guardada: mexer num widget só recalcula aquele predicado e o AND final.
+# Predicados cuja seleção cobre todo o domínio da coluna são ignorados.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentacao import instrumenta
+from utils.memo import memo_por_objeto
+
+## Colunas filtradas por intervalo na barra lateral; as demais colunas filtradas são por lista de valores
+COLUNAS_INTERVALO = ('Preço', 'Frete', 'Data da Compra', 'Avaliação da compra', 'Quantidade de parcelas')
+
+# Máscaras guardadas por coluna (mais de uma, porque o motor é compartilhado entre as sessões)
+MASCARAS_POR_COLUNA = 8
+
+
+class _IndiceCategoria:
+
+    def __init__(self, serie):
+        if not isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype('category')
+        self.codigos = serie.cat.codes.to_numpy()
+        self.categorias = serie.cat.categories
+        self.presentes = np.unique(self.codigos[self.codigos >= 0])
+        self.tem_vazios = bool((self.codigos < 0).any())
+
+    def mascara(self, selecionados):
+        # Uma posição a mais na tabela de consulta: o código -1 (vazio) cai nela e nunca é selecionado
+        consulta = np.zeros(len(self.categorias) + 1, dtype = bool)
+        indices = self.categorias.get_indexer(list(selecionados))
+        consulta[indices[indices >= 0]] = True
+        if consulta[self.presentes].all() and not self.tem_vazios:
+            return None
+        return consulta[self.codigos]
+
+
+class _IndiceIntervalo:
+
+    def __init__(self, serie):
+        invalidos = serie.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valores = serie.to_numpy('datetime64[ns]').view('int64')
+            self.converte = lambda limite: pd.Timestamp(limite).value
+        else:
+            valores = serie.to_numpy(dtype = 'float64', na_value = np.nan)
+            self.converte = float
+        self.ordem = np.lexsort((valores, invalidos))  # Ordena pelo valor, com os vazios (NaN/NaT) no fim
+        self.validos = len(valores) - int(invalidos.sum())
+        self.ordenados = valores[self.ordem[:self.validos]]
+        self.linhas = len(valores)
+
+    def mascara(self, intervalo):
+        if len(intervalo) < 2:
+            return None  # O date_input devolve só o início enquanto o usuário escolhe o fim
+        inicio, fim = self.converte(intervalo[0]), self.converte(intervalo[1])
+        cobre_tudo = self.validos == 0 or (inicio <= self.ordenados[0] and fim >= self.ordenados[-1])
+        if cobre_tudo and self.validos == self.linhas:
+            return None
+        baixo = np.searchsorted(self.ordenados, inicio, side = 'left')
+        alto = np.searchsorted(self.ordenados, fim, side = 'right')
+        mascara = np.zeros(self.linhas, dtype = bool)
+        mascara[self.ordem[baixo:alto]] = True
+        return mascara
+
+
+class MotorFiltros:
+
+    def __init__(self, dados):
+        self.linhas = len(dados)
+        self._indices = {}
+        for coluna in dados.columns:
+            if coluna in COLUNAS_INTERVALO:
+                self._indices[coluna] = _IndiceIntervalo(dados[coluna])
+            elif isinstance(dados[coluna].dtype, pd.CategoricalDtype) or dados[coluna].dtype == object:
+                self._indices[coluna] = _IndiceCategoria(dados[coluna])
+        self._mascaras = {coluna: OrderedDict() for coluna in self._indices}
+        self._ordens = {}  # coluna -> posições das linhas em ordem crescente, montadas na primeira ordenação
+        self._trava = threading.Lock()
+
+    def _mascara_predicado(self, coluna, selecao):
+        chave = frozenset(selecao) if isinstance(self._indices[coluna], _IndiceCategoria) else tuple(selecao)
+        guardadas = self._mascaras[coluna]
+        with self._trava:
+            if chave in guardadas:
+                guardadas.move_to_end(chave)
+                return guardadas[chave]
+        mascara = self._indices[coluna].mascara(selecao)
+        with self._trava:
+            guardadas[chave] = mascara
+            if len(guardadas) > MASCARAS_POR_COLUNA:
+                guardadas.popitem(last = False)
+        return mascara
+
+    ## Máscara booleana das linhas que atendem a todas as seleções {coluna: lista de valores ou (início, fim)},
+    ## ou None quando nenhum predicado restringe os dados
+    @instrumenta('filtros: máscara')
+    def mascara(self, selecoes):
+        mascaras = [mascara for coluna, selecao in selecoes.items()
+                    if (mascara := self._mascara_predicado(coluna, selecao)) is not None]
+        if not mascaras:
+            return None
+        if len(mascaras) == 1:
+            return mascaras[0]
+        return np.logical_and.reduce(mascaras)
+
+    ## Posições de todas as linhas ordenadas pela coluna (vazios no fim), reaproveitando os índices do filtro
+    def ordem(self, dados, coluna):
+        with self._trava:
+            if coluna in self._ordens:
+                return self._ordens[coluna]
+        indice = self._indices.get(coluna)
+        if isinstance(indice, _IndiceIntervalo):
+            ordem = indice.ordem
+        elif isinstance(indice, _IndiceCategoria):
+            # Posto alfabético de cada categoria; o código -1 (vazio) cai na última posição e vai para o fim
+            postos = np.empty(len(indice.categorias) + 1, dtype = np.int64)
+            postos[np.argsort(indice.categorias.astype(str))] = np.arange(len(indice.categorias))
+            postos[-1] = len(indice.categorias)
+            ordem = np.argsort(postos[indice.codigos], kind = 'stable')
+        else:
+            ordem = np.argsort(dados[coluna].to_numpy(), kind = 'stable')
+        with self._trava:
+            self._ordens[coluna] = ordem
+        return ordem
+
+    def filtra(self, dados, selecoes):
+        mascara = self.mascara(selecoes)
+        return dados if mascara is None else dados[mascara]
+
+
+## Motor de filtros de um dataset carregado, montado uma vez e reaproveitado entre as reexecuções
+@memo_por_objeto
+@instrumenta('filtros: montagem dos índices')
+def motor_filtros(dados):
+    return MotorFiltros(dados)
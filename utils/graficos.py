@@ -0,0 +1,202 @@
+# Construção dos gráficos do Dashboard com cache.
+# Cada figura é guardada pela assinatura (hash) da tabela de entrada mais os parâmetros; se a tabela não
+# mudou entre as reexecuções, a mesma figura é reaproveitada em vez de chamar o plotly de novo.
+# O plotly.express é importado só quando uma figura é de fato construída, fora do caminho da primeira tela
+# quando as figuras já estão em cache.
+
+import functools
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils import config
+from utils.cache import CacheTTL
+from utils.instrumentacao import etapa
+
+logger = logging.getLogger(__name__)
+
+## Zoom no BR, compartilhado pelos dois mapas
+LAYOUT_GEO_BRASIL = dict(
+    visible=False,
+    resolution=110,
+    showcountries=True,
+    countrycolor="darkgray",
+    countrywidth=1.5,
+    showsubunits=True,
+    subunitcolor="lightgray",
+    lataxis_range=[-35, 5],
+    lonaxis_range=[-80, -30],
+)
+
+_cache = CacheTTL(config.CACHE_MAX_FIGURAS, float('inf'))
+
+
+## Assinatura de um argumento: tabelas viram o hash do conteúdo (com índice e nomes das colunas)
+def _assinatura(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        nomes = tuple(map(str, valor.columns)) if isinstance(valor, pd.DataFrame) else (str(valor.name),)
+        conteudo = pd.util.hash_pandas_object(valor, index = True).to_numpy().tobytes()
+        return ('tabela', nomes, hashlib.blake2b(conteudo, digest_size = 16).hexdigest())
+    return valor
+
+
+def figura_em_cache(funcao):
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        chave = (funcao.__name__,
+                 tuple(_assinatura(valor) for valor in args),
+                 tuple(sorted((nome, _assinatura(valor)) for nome, valor in kwargs.items())))
+        with etapa(f'figura: {funcao.__name__}') as medida:
+            def constroi():
+                medida.registra(construida = True)
+                return funcao(*args, **kwargs)
+            return _cache.obtem(chave, constroi)
+    return envoltorio
+
+
+### MAPA por estado (receita ou vendas)
+@figura_em_cache
+def mapa_estados(tabela, titulo):
+    import plotly.express as px
+    fig = px.scatter_geo(tabela,
+                         lat = 'lat',
+                         lon = 'lon',
+                         scope = 'south america',
+                         size = 'Preço',
+                         template = 'seaborn',
+                         hover_name = 'Local da compra',
+                         hover_data = {'lat': False, 'lon': False},
+                         title = titulo)
+    fig.update_geos(**LAYOUT_GEO_BRASIL)
+    return fig
+
+
+### Gráfico de LINHAS mensal
+@figura_em_cache
+def linha_mensal(tabela, titulo, eixo_y):
+    import plotly.express as px
+    fig = px.line(tabela,
+                  x = 'Mês',
+                  y = 'Preço',
+                  markers=True,
+                  range_y = (0, tabela.max()),
+                  color = 'Ano',
+                  line_dash = 'Ano',
+                  title = titulo)
+    fig.update_layout(yaxis_title = eixo_y) # Necessário realizar isso por conta que o eixo y está como 'Preço'
+    return fig
+
+
+### Gráfico de BARRAS dos estados (só os primeiros da tabela, que já vem ordenada)
+@figura_em_cache
+def barras_estados(tabela, titulo, eixo_y, formato_y = None):
+    import plotly.express as px
+    fig = px.bar(tabela.head(),
+                 x = 'Local da compra',
+                 y = 'Preço',
+                 text_auto=True,     # Parâmetro para inserir o valor no alto da barra (rótulo de dado)
+                 title = titulo)
+    fig.update_layout(yaxis_title = eixo_y)
+    if formato_y:
+        fig.update_yaxes(tickformat=formato_y)
+    return fig
+
+
+### Gráfico de BARRAS por categoria (como só há dois campos nessa tabela, o plotly imediatamente reconhece)
+@figura_em_cache
+def barras_categorias(tabela, titulo, eixo_y, formato_y = None):
+    import plotly.express as px
+    fig = px.bar(tabela,
+                 text_auto=True,
+                 title = titulo)
+    fig.update_layout(yaxis_title = eixo_y)
+    if formato_y:
+        fig.update_yaxes(tickformat=formato_y)
+    return fig
+
+
+### Gráfico de BARRAS dos TOP vendedores por uma medida ('sum' para receita, 'count' para vendas)
+@figura_em_cache
+def barras_vendedores(vendedores, medida, quantidade, titulo):
+    import plotly.express as px
+    top = vendedores.nlargest(quantidade, medida)[[medida]]
+    fig = px.bar(top,
+                 x = medida,
+                 y = top.index,
+                 text_auto=True,
+                 title = titulo)
+    fig.update_layout(yaxis_title = 'Nome do vendedor')
+    return fig
+
+
+## ------------------------ SEÇÕES DO DASHBOARD ------------------------ ##
+# Cada seção do Dashboard monta só as suas figuras. A reexecução constrói a seção visível e as outras são
+# aquecidas em segundo plano, então a troca de seção já encontra as figuras no cache acima.
+
+QTD_VENDEDORES_PADRAO = 5
+
+
+### Seção de RECEITAS
+def figuras_receita(agregados):
+    return {
+        'mapa_receita': mapa_estados(agregados.receita_estados, 'Receita por Estado'),
+        'receita_estados': barras_estados(agregados.receita_estados, 'Top Estados com maior receita', 'Receita', '.2s'),  # Formatar os rótulos do eixo y com duas casas decimais
+        'receita_mensal': linha_mensal(agregados.receita_mensal, 'Receita Mensal', 'Receita'),
+        'receita_produtos': barras_categorias(agregados.receita_categorias, 'Receita por categoria de produto', 'Receita', '.2s'),
+    }
+
+
+### Seção de VENDAS
+def figuras_vendas(agregados):
+    return {
+        'mapa_vendas': mapa_estados(agregados.vendas_estados, 'Vendas por Estado'),
+        'vendas_estados': barras_estados(agregados.vendas_estados, 'Top Estados com maiores vendas', 'Vendas'),
+        'venda_mensal': linha_mensal(agregados.venda_mensal, 'Vendas Mensais', 'Vendas'),
+        'vendas_produtos': barras_categorias(agregados.vendas_categorias, 'Vendas por categoria de produto', 'Vendas'),
+    }
+
+
+### Seção de VENDEDORES (só ela depende da quantidade escolhida pelo usuário)
+def figuras_vendedores(agregados, quantidade = QTD_VENDEDORES_PADRAO):
+    return {
+        'receita_vendedores': barras_vendedores(agregados.vendedores, 'sum', quantidade, f'TOP {quantidade} vendedores (por receita)'),
+        'vendas_vendedores': barras_vendedores(agregados.vendedores, 'count', quantidade, f'TOP {quantidade} vendedores (por vendas)'),
+    }
+
+
+SECOES = {
+    'Receita': figuras_receita,
+    'Quantidade de Vendas': figuras_vendas,
+    'Vendedores': figuras_vendedores,
+}
+
+# Uma thread só para o aquecimento, assim ele não disputa a CPU com as reexecuções das sessões
+_aquecimento = None
+_pendentes = set()  # (id dos agregados, seção) já enviados e ainda não montados
+_trava_aquecimento = threading.Lock()
+
+
+def _aquece(chave, agregados):
+    try:
+        SECOES[chave[1]](agregados)
+    except Exception:
+        logger.warning('Falha ao aquecer as figuras da seção %s', chave[1], exc_info = True)
+    finally:
+        with _trava_aquecimento:
+            _pendentes.discard(chave)
+
+
+## Monta em segundo plano as figuras das seções indicadas (com os parâmetros padrão)
+def aquece_secoes(agregados, secoes):
+    global _aquecimento
+    with _trava_aquecimento:
+        if _aquecimento is None:
+            _aquecimento = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = 'aquece-figuras')
+        for secao in secoes:
+            chave = (id(agregados), secao)
+            if chave not in _pendentes:
+                _pendentes.add(chave)
+                _aquecimento.submit(_aquece, chave, agregados)
@@ -0,0 +1,148 @@
+# Leitura em fluxo do JSON da API.
+# O corpo da resposta é lido em pedaços e cada registro é decodificado assim que fica completo,
+# indo direto para buffers tipados por coluna (códigos de categoria, array de floats, dias da data).
+# Assim a lista completa de dicts nunca existe em memória junto com os bytes e o dataframe.
+
+import codecs
+import json
+import re
+from array import array
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.esquema import ESQUEMA
+
+COLUNA_DATA = 'Data da Compra'
+_EPOCA = date(1970, 1, 1).toordinal()
+_DATA_FALTANTE = -2**31
+
+_SEPARADORES = re.compile(r'[\s,]*')
+_ESPACOS = re.compile(r'\s*')
+
+
+## Buffers tipados de cada coluna
+class _ColunaCategoria:
+
+    def __init__(self):
+        self.codigos = array('i')
+        self.categorias = {}  # valor -> código, na ordem em que aparecem
+
+    def adiciona(self, valor):
+        if valor is None:
+            self.codigos.append(-1)
+        else:
+            self.codigos.append(self.categorias.setdefault(valor, len(self.categorias)))
+
+    def finaliza(self):
+        return pd.Categorical.from_codes(np.frombuffer(self.codigos, dtype = np.int32), categories = list(self.categorias))
+
+
+class _ColunaNumero:
+
+    def __init__(self):
+        self.valores = array('d')
+
+    def adiciona(self, valor):
+        self.valores.append(np.nan if valor is None else valor)
+
+    def finaliza(self):
+        return np.frombuffer(self.valores, dtype = np.float64)  # O tipo final vem do ESQUEMA, na normalização
+
+
+class _ColunaData:
+
+    def __init__(self):
+        self.dias = array('i')
+        self._memo = {}  # As datas se repetem muito, cada texto só é convertido uma vez
+
+    def adiciona(self, texto):
+        dias = self._memo.get(texto)
+        if dias is None:
+            if texto is None:
+                dias = _DATA_FALTANTE
+            else:
+                dia, mes, ano = texto.split('/')  # Formato '%d/%m/%Y' da API
+                dias = date(int(ano), int(mes), int(dia)).toordinal() - _EPOCA
+            self._memo[texto] = dias
+        self.dias.append(dias)
+
+    def finaliza(self):
+        dias = np.frombuffer(self.dias, dtype = np.int32)
+        datas = dias.astype('datetime64[D]')
+        datas[dias == _DATA_FALTANTE] = np.datetime64('NaT')
+        return datas.astype('datetime64[ns]')
+
+
+class _ColunaLista:
+
+    def __init__(self):
+        self.valores = []
+
+    def adiciona(self, valor):
+        self.valores.append(valor)
+
+    def finaliza(self):
+        return self.valores
+
+
+def _nova_coluna(nome):
+    if nome == COLUNA_DATA:
+        return _ColunaData()
+    tipo = ESQUEMA.get(nome)
+    if tipo == 'category':
+        return _ColunaCategoria()
+    if tipo is not None:
+        return _ColunaNumero()
+    return _ColunaLista()
+
+
+## Decodifica os registros de um array JSON à medida que os pedaços chegam
+def registros_em_fluxo(pedacos):
+    decodificador_utf8 = codecs.getincrementaldecoder('utf-8')()
+    decodificador_json = json.JSONDecoder()
+    texto = ''
+    inicio_array = True
+    for pedaco in pedacos:
+        texto += decodificador_utf8.decode(pedaco)
+        posicao = 0
+        if inicio_array:
+            posicao = _ESPACOS.match(texto).end()
+            if posicao == len(texto):
+                continue
+            if texto[posicao] != '[':
+                raise ValueError('O JSON em fluxo precisa ser um array de registros')
+            posicao += 1
+            inicio_array = False
+        while True:
+            posicao = _SEPARADORES.match(texto, posicao).end()
+            if posicao == len(texto) or texto[posicao] == ']':
+                break
+            try:
+                registro, posicao = decodificador_json.raw_decode(texto, posicao)
+            except json.JSONDecodeError:
+                break  # Registro incompleto, espera o próximo pedaço
+            yield registro
+        texto = texto[posicao:]
+    texto += decodificador_utf8.decode(b'', final = True)
+    if texto.strip() not in (']', ''):
+        raise ValueError(f'JSON incompleto ou inválido perto de: {texto[:80]!r}')
+
+
+## Monta o dataframe a partir dos pedaços do corpo da resposta, coluna a coluna
+def dataframe_em_fluxo(pedacos):
+    colunas = {}
+    linhas = 0
+    for registro in registros_em_fluxo(pedacos):
+        if registro.keys() != colunas.keys():
+            for nome in registro:  # Na ordem do registro, assim as colunas saem na mesma ordem da API
+                if nome not in colunas:
+                    # Coluna que não apareceu nos registros anteriores: preenche as linhas já lidas com vazio
+                    colunas[nome] = _nova_coluna(nome)
+                    for _ in range(linhas):
+                        colunas[nome].adiciona(None)
+        for nome, coluna in colunas.items():
+            coluna.adiciona(registro.get(nome))
+        linhas += 1
+    return pd.DataFrame({nome: coluna.finaliza() for nome, coluna in colunas.items()})
@@ -0,0 +1,136 @@
+# Medição do tempo (e opcionalmente da memória) de cada etapa de uma reexecução das páginas.
+# Ligada por DASHBOARD_DEBUG=1: as etapas aparecem num painel na barra lateral e vão para um log JSONL
+# rotativo, para análise offline (as etapas das threads de segundo plano vão só para o log). Desligada, etapa() devolve um objeto nulo compartilhado e instrumenta()
+# devolve a própria funcao, então o custo é praticamente zero.
+#
+#     with etapa('cubo: montagem') as medida:
+#         ...
+#         medida.registra(bytes = tamanho)
+
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+import uuid
+from logging.handlers import RotatingFileHandler
+
+from utils import config
+
+ATIVO = config.DEBUG
+MEMORIA = config.DEBUG_MEMORIA
+
+# O Streamlit executa cada reexecução numa thread própria, então as etapas são guardadas por thread
+_execucao = threading.local()
+
+_log = None
+_trava_log = threading.Lock()
+
+
+class _Etapa:
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.medidas = {}
+
+    def registra(self, **medidas):
+        self.medidas.update(medidas)
+
+    def __enter__(self):
+        if MEMORIA:
+            tracemalloc.reset_peak()  # Com etapas aninhadas, o pico da externa começa na última interna
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, erro, rastro):
+        registro = {'etapa': self.nome, 'ms': round((time.perf_counter() - self.inicio) * 1000, 2), **self.medidas}
+        if MEMORIA:
+            registro['pico_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        if tipo_erro is not None:
+            registro['erro'] = tipo_erro.__name__
+        etapas = getattr(_execucao, 'etapas', None)
+        if etapas is not None:
+            etapas.append(registro)
+        else:
+            _registra_em_segundo_plano(registro)
+        return False
+
+
+class _EtapaNula:
+
+    def registra(self, **medidas):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULA = _EtapaNula()
+
+
+def etapa(nome):
+    return _Etapa(nome) if ATIVO else _NULA
+
+
+## Decorator que mede a funcao inteira como uma etapa
+def instrumenta(nome):
+    def decorator(funcao):
+        if not ATIVO:
+            return funcao
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with etapa(nome):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorator
+
+
+## Início de uma reexecução da página: descarta as etapas da anterior
+def inicia_execucao(pagina):
+    if not ATIVO:
+        return
+    if MEMORIA and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _execucao.pagina = pagina
+    _execucao.id = uuid.uuid4().hex[:12]
+    _execucao.etapas = []
+
+
+def _logger():
+    global _log
+    with _trava_log:
+        if _log is None:
+            _log = logging.getLogger('dashboard.desempenho')
+            _log.propagate = False
+            _log.setLevel(logging.INFO)
+            manipulador = RotatingFileHandler(config.ARQUIVO_LOG_DESEMPENHO, maxBytes = config.LOG_DESEMPENHO_MAX_BYTES,
+                                              backupCount = config.LOG_DESEMPENHO_ARQUIVOS, encoding = 'utf-8')
+            manipulador.setFormatter(logging.Formatter('%(message)s'))
+            _log.addHandler(manipulador)
+        return _log
+
+
+## Etapas fora de uma reexecução (threads de segundo plano: atualização do snapshot, prefetch, aquecimento das
+## figuras) não aparecem em nenhum painel, então vão direto para o log, com o nome da thread
+def _registra_em_segundo_plano(registro):
+    _logger().info(json.dumps({'instante': time.time(), 'pagina': None, 'thread': threading.current_thread().name,
+                               **registro}, ensure_ascii = False))
+
+
+## Fim da reexecução: grava as etapas no log JSONL (uma linha por etapa) e as devolve para o painel
+def finaliza_execucao():
+    if not ATIVO:
+        return []
+    etapas = getattr(_execucao, 'etapas', None) or []
+    _execucao.etapas = None  # O que vier depois nesta thread já não é desta reexecução
+    instante = time.time()
+    log = _logger()
+    for registro in etapas:
+        log.info(json.dumps({'instante': instante, 'pagina': _execucao.pagina, 'execucao': _execucao.id, **registro},
+                            ensure_ascii = False))
+    return etapas
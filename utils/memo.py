@@ -0,0 +1,33 @@
+# Memoização pela identidade do dataframe.
+# Os dataframes carregados ficam no cache do carregamento e são os mesmos objetos entre as reexecuções,
+# então estruturas derivadas (tabela de coordenadas, índices de filtro) podem ser calculadas uma vez por objeto.
+# A referência fraca descarta o resultado quando o dataframe sai do cache.
+
+import functools
+import itertools
+import weakref
+
+
+def memo_por_objeto(funcao):
+    memos = {}  # id(objeto) -> (referência fraca, resultado)
+
+    @functools.wraps(funcao)
+    def envoltorio(objeto):
+        chave = id(objeto)
+        memo = memos.get(chave)
+        if memo is not None and memo[0]() is objeto:
+            return memo[1]
+        resultado = funcao(objeto)
+        memos[chave] = (weakref.ref(objeto, lambda _, chave=chave: memos.pop(chave, None)), resultado)
+        return resultado
+
+    return envoltorio
+
+
+_contador_versoes = itertools.count(1)
+
+
+## Número de versão de um dataset carregado, para compor chaves de cache de resultados derivados dele
+@memo_por_objeto
+def versao(objeto):
+    return next(_contador_versoes)
@@ -0,0 +1,39 @@
+# Paginação da Tabela de dados feita no servidor.
+# Só a página visível é recortada do dataframe e enviada ao navegador; a ordenação usa a ordem
+# pré-calculada da coluna (utils.filtros) restrita à máscara dos filtros, sem ordenar o recorte de novo.
+
+import math
+
+import numpy as np
+
+from utils import config
+from utils.cache import CacheTTL
+from utils.instrumentacao import instrumenta
+
+TAMANHOS_PAGINA = [50, 100, 500, 1000]
+
+_cache = CacheTTL(config.CACHE_MAX_PAGINACAO, config.CACHE_TTL)
+
+
+## Posições (no dataframe completo) das linhas que passam nos filtros, na ordem de exibição.
+## Ficam em cache pela impressão digital dos filtros, então trocar de página não refaz nada.
+@instrumenta('paginação: ordem das linhas')
+def linhas_visiveis(motor, dados, mascara, impressao, ordenar_por = None, crescente = True):
+    def calcula():
+        if ordenar_por is None:
+            posicoes = np.arange(len(dados)) if mascara is None else np.flatnonzero(mascara)
+        else:
+            ordem = motor.ordem(dados, ordenar_por)
+            posicoes = ordem if mascara is None else ordem[mascara[ordem]]
+        return posicoes if crescente else posicoes[::-1]
+    return _cache.obtem((impressao, ordenar_por, crescente), calcula)
+
+
+def total_paginas(total_linhas, tamanho):
+    return max(1, math.ceil(total_linhas / tamanho))
+
+
+## Recorte da página (numeração a partir de 1) só com as colunas escolhidas
+def pagina(dados, posicoes, colunas, tamanho, numero):
+    inicio = (numero - 1) * tamanho
+    return dados.iloc[posicoes[inicio:inicio + tamanho]][colunas]
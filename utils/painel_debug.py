@@ -0,0 +1,21 @@
+# Painel de desempenho na barra lateral (só com DASHBOARD_DEBUG=1), usado pelas duas páginas
+
+import pandas as pd
+import streamlit as st
+
+from utils import instrumentacao
+
+
+## Fecha a medição da reexecução e mostra as etapas, da mais lenta para a mais rápida
+def mostra_painel_debug():
+    etapas = instrumentacao.finaliza_execucao()
+    if not instrumentacao.ATIVO:
+        return
+    with st.sidebar.expander('Desempenho (debug)', expanded = True):
+        if not etapas:
+            st.caption('Nenhuma etapa medida nesta reexecução.')
+            return
+        tabela = pd.DataFrame(etapas)
+        st.metric('Tempo medido', f'{tabela["ms"].sum():.0f} ms')
+        st.dataframe(tabela.sort_values('ms', ascending = False), use_container_width = True, hide_index = True)
+        st.caption(f'Registrado em {instrumentacao.config.ARQUIVO_LOG_DESEMPENHO}')
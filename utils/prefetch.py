@@ -0,0 +1,78 @@
+# Pré-carregamento das partições região/ano no modo FILTRO_NA_API.
+# Nesse modo cada combinação de região e ano é uma requisição separada; em vez de esperar o usuário escolher,
+# todas são baixadas em paralelo (com limite de concorrência, novas tentativas e prazo por partição) logo na
+# partida, enchendo o mesmo cache do carregamento. Assim a primeira troca de filtro já encontra os dados prontos.
+# Depois, a cada DASHBOARD_PREFETCH_INTERVALO segundos (por padrão 3/4 do TTL do cache), as partições são baixadas
+# de novo e trocadas no cache antes de expirarem, para que a troca de filtro continue instantânea.
+
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from utils import config
+from utils.carregamento import carrega_dados, recarrega_dados
+from utils.regioes import UFS_POR_REGIAO
+
+logger = logging.getLogger(__name__)
+
+## Mesmas opções dos filtros do Dashboard ('' = Brasil / todo o período)
+REGIOES = [''] + list(UFS_POR_REGIAO)
+ANOS = [''] + list(range(2020, 2024))
+
+_iniciado = False
+_trava = threading.Lock()
+
+
+def particoes():
+    return list(itertools.product(REGIOES, ANOS))
+
+
+## Baixa todas as partições e devolve {(regiao, ano): None quando deu certo, ou a exceção da última tentativa}.
+## Com recarrega=True as partições são baixadas mesmo se já estiverem no cache.
+def aquece_particoes(colunas = None, paralelo = None, tentativas = None, prazo = None, recarrega = False):
+    paralelo = paralelo or config.PREFETCH_PARALELO
+    prazo = prazo or config.PREFETCH_PRAZO
+
+    @retry(retry = retry_if_exception_type(requests.RequestException),
+           stop = stop_after_attempt(tentativas or config.PREFETCH_TENTATIVAS),
+           wait = wait_exponential(multiplier = 0.5, max = 8),
+           reraise = True)
+    def carrega(regiao, ano):
+        if recarrega:
+            recarrega_dados(regiao, ano, prazo = prazo)
+        carrega_dados(regiao, ano, colunas, prazo = prazo)  # Já deixa pronto o recorte das colunas da página
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers = paralelo, thread_name_prefix = 'prefetch') as pool:
+        futuros = {particao: pool.submit(carrega, *particao) for particao in particoes()}
+        for particao, futuro in futuros.items():
+            erro = futuro.exception()
+            resultados[particao] = erro
+            if erro is not None:
+                logger.warning('Falha ao pré-carregar %s: %s', particao, erro)
+    return resultados
+
+
+## Primeira carga e depois as recargas periódicas, medindo o intervalo a partir do início de cada rodada
+def _mantem_aquecido(colunas):
+    recarrega = False
+    while True:
+        inicio = time.monotonic()
+        aquece_particoes(colunas, recarrega = recarrega)
+        recarrega = True
+        time.sleep(max(0.0, config.PREFETCH_INTERVALO - (time.monotonic() - inicio)))
+
+
+## Dispara o pré-carregamento numa thread de fundo, uma única vez por processo do servidor
+def inicia_prefetch(colunas = None):
+    global _iniciado
+    with _trava:
+        if _iniciado:
+            return
+        _iniciado = True
+    threading.Thread(target = _mantem_aquecido, args = (colunas,), name = 'prefetch', daemon = True).start()
@@ -0,0 +1,41 @@
+# Tabela estado -> região e filtragem local de região/ano.
+# Com o dataset completo em memória, trocar a região ou o ano vira uma máscara booleana
+# em vez de uma nova requisição para a API.
+
+## Siglas dos estados (como vêm em 'Local da compra') agrupadas pela região do IBGE
+UFS_POR_REGIAO = {
+    'Centro-Oeste': ('DF', 'GO', 'MS', 'MT'),
+    'Nordeste': ('AL', 'BA', 'CE', 'MA', 'PB', 'PE', 'PI', 'RN', 'SE'),
+    'Norte': ('AC', 'AM', 'AP', 'PA', 'RO', 'RR', 'TO'),
+    'Sudeste': ('ES', 'MG', 'RJ', 'SP'),
+    'Sul': ('PR', 'RS', 'SC'),
+}
+
+REGIAO_POR_UF = {uf: regiao for regiao, ufs in UFS_POR_REGIAO.items() for uf in ufs}
+
+# A API recebe a região em minúsculas, então a busca aceita as duas formas
+_UFS_POR_REGIAO_MINUSCULA = {regiao.lower(): ufs for regiao, ufs in UFS_POR_REGIAO.items()}
+
+
+## Estados de uma região ('' ou 'Brasil' devolvem None, ou seja, sem filtro)
+def ufs_da_regiao(regiao):
+    if not regiao or regiao.lower() == 'brasil':
+        return None
+    try:
+        return _UFS_POR_REGIAO_MINUSCULA[regiao.lower()]
+    except KeyError:
+        raise ValueError(f'Região desconhecida: {regiao!r}') from None
+
+
+## Aplica os filtros de região e ano em memória, com a mesma semântica dos parâmetros da API
+def filtra_regiao_ano(dados, regiao = '', ano = ''):
+    mascara = None
+    ufs = ufs_da_regiao(regiao)
+    if ufs is not None:
+        mascara = dados['Local da compra'].isin(ufs)
+    if ano != '':
+        mascara_ano = dados['Data da Compra'].dt.year == int(ano)
+        mascara = mascara_ano if mascara is None else mascara & mascara_ano
+    if mascara is None:
+        return dados
+    return dados[mascara]
@@ -0,0 +1,130 @@
+# Cópia local dos dados da API em Parquet.
+# As páginas leem o snapshot (só as colunas necessárias) em vez de depender da API a cada partida a frio;
+# a atualização mescla apenas as linhas novas desde a última 'Data da Compra' gravada (marca d'água).
+#
+# Para aquecer ou recriar o snapshot sem abrir o Streamlit:
+#     python -m utils.snapshot                       # atualiza a partir da API
+#     python -m utils.snapshot --fixture dados.json  # usa um JSON local no formato da API
+#     python -m utils.snapshot --recria              # descarta o snapshot e grava tudo de novo
+
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils import config
+from utils.esquema import VERSAO_ESQUEMA, normaliza
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_DADOS = 'produtos.parquet'
+ARQUIVO_METADADOS = 'metadados.json'
+
+
+class Snapshot:
+
+    def __init__(self, diretorio = None):
+        self.diretorio = Path(diretorio or config.DIRETORIO_SNAPSHOT)
+
+    @property
+    def caminho_dados(self):
+        return self.diretorio / ARQUIVO_DADOS
+
+    @property
+    def caminho_metadados(self):
+        return self.diretorio / ARQUIVO_METADADOS
+
+    ## Snapshot gravado e com os tipos do esquema atual (um snapshot de outra versão é tratado como inexistente)
+    def existe(self):
+        return (self.caminho_dados.exists() and self.caminho_metadados.exists()
+                and self.metadados().get('esquema') == VERSAO_ESQUEMA)
+
+    def metadados(self):
+        with open(self.caminho_metadados, encoding = 'utf-8') as arquivo:
+            return json.load(arquivo)
+
+    ## Segundos desde a última atualização (gravação ou conferência com a API)
+    def idade(self):
+        return time.time() - self.metadados()['atualizado_em']
+
+    def marca_dagua(self):
+        return pd.Timestamp(self.metadados()['marca_dagua'])
+
+    ## Lê o snapshot, opcionalmente só algumas colunas (o Parquet é colunar, as demais nem saem do disco)
+    def le(self, colunas = None):
+        return pd.read_parquet(self.caminho_dados, columns = list(colunas) if colunas else None)
+
+    def _grava_metadados(self, metadados):
+        texto = json.dumps(metadados)
+        self._substitui(self.caminho_metadados, lambda caminho: caminho.write_text(texto, encoding = 'utf-8'))
+
+    # Grava num arquivo temporário e troca de uma vez, assim uma página nunca lê um Parquet pela metade
+    def _substitui(self, destino, grava):
+        temporario = destino.with_name(destino.name + '.tmp')
+        grava(temporario)
+        os.replace(temporario, destino)
+
+    ## Grava o dataset completo, descartando o que havia
+    def grava(self, dados):
+        self.diretorio.mkdir(parents = True, exist_ok = True)
+        self._substitui(self.caminho_dados, lambda caminho: dados.to_parquet(caminho, index = False))
+        self._grava_metadados({
+            'marca_dagua': dados['Data da Compra'].max().isoformat(),
+            'linhas': len(dados),
+            'atualizado_em': time.time(),
+            'esquema': VERSAO_ESQUEMA,
+        })
+
+    ## Mescla as linhas novas e devolve quantas foram incluídas.
+    ## O dia da marca d'água é substituído inteiro, pois pode ter sido gravado com vendas parciais.
+    def atualiza(self, dados):
+        if not self.existe():
+            self.grava(dados)
+            return len(dados)
+
+        marca = self.marca_dagua()
+        novos = dados[dados['Data da Compra'] >= marca]
+        atuais = self.le()
+        mantidos = atuais[atuais['Data da Compra'] < marca]
+        linhas_novas = len(mantidos) + len(novos) - len(atuais)
+        if linhas_novas <= 0:
+            # Nada novo na API: só renova o horário da conferência
+            metadados = self.metadados()
+            metadados['atualizado_em'] = time.time()
+            self._grava_metadados(metadados)
+            return 0
+
+        # O concat de colunas category com categorias diferentes volta para object, por isso normaliza de novo
+        combinados = normaliza(pd.concat([mantidos, novos], ignore_index = True))
+        self.grava(combinados)
+        logger.info('Snapshot atualizado: %d linhas novas desde %s', linhas_novas, marca.date())
+        return linhas_novas
+
+
+def main(argumentos = None):
+    parser = argparse.ArgumentParser(description = 'Aquece ou recria o snapshot Parquet dos dados da API.')
+    parser.add_argument('--diretorio', default = None, help = 'Diretório do snapshot (padrão: DASHBOARD_DIRETORIO_SNAPSHOT)')
+    parser.add_argument('--fixture', default = None, help = 'Arquivo JSON local no formato da API, no lugar da requisição')
+    parser.add_argument('--recria', action = 'store_true', help = 'Descarta o snapshot atual e grava tudo de novo')
+    argumentos = parser.parse_args(argumentos)
+
+    # Importado aqui porque o carregamento também usa este módulo
+    from utils.carregamento import baixa_dados, le_fixture
+
+    dados = le_fixture(argumentos.fixture) if argumentos.fixture else baixa_dados()
+    snapshot = Snapshot(argumentos.diretorio)
+    if argumentos.recria:
+        snapshot.grava(dados)
+        print(f'Snapshot recriado com {len(dados)} linhas em {snapshot.diretorio}')
+    else:
+        linhas_novas = snapshot.atualiza(dados)
+        print(f'{linhas_novas} linhas novas; snapshot com {snapshot.metadados()["linhas"]} linhas em {snapshot.diretorio}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level = logging.INFO)
+    main()